@@ -0,0 +1,354 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Benchmarks the codebase scanners/codemods on synthetic TS/TSX trees.
+#
+# Trees are generated from a fixed seed, so the same size always produces
+# the same files and results from different commits are comparable. Each
+# tool runs as its own process inside the tree; wall time comes from the
+# parent and peak RSS from a small wrapper process around the tool, so the
+# rewriting tools' worker processes are counted too.
+#
+#   python benchmarks/bench_scanners.py                    # 1k + 10k
+#   python benchmarks/bench_scanners.py --sizes 100k --timeout 3600
+#   python benchmarks/bench_scanners.py --sizes 1k --repeat 5
+#   python benchmarks/bench_scanners.py --compare benchmarks/results/<old>.json
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+TREES_DIR = os.path.join(BENCH_DIR, ".trees")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+# 100k takes the slower tools well over an hour, so it only runs when asked for
+DEFAULT_SIZES = ["1k", "10k"]
+# Seconds one tool run may take before it is killed and reported as timed out
+TIMEOUT = 900
+SEED = 20251110
+# Untimed runs before the measured ones, so every size starts with a warm page cache
+WARMUP_RUNS = 1
+# Bumped whenever the generator changes, so cached trees are rebuilt
+GENERATOR_VERSION = 1
+
+# (name, script, extra args, rewrites files in place)
+TOOLS = [
+    ("scan_db_usage", "scan_db_usage.py", [], False),
+    ("scan_redundancy", "scan_redundancy.py", [], False),
+    ("purge_dead_code", "purge_dead_code.py", [], True),
+    ("wire_frontend_client", "wire_frontend_client.py", [], True),
+]
+
+# --- TREE SHAPE ---
+# Share of source files with .from('table') queries, and queries per such file
+QUERY_FILE_RATE = 0.35
+QUERIES_PER_FILE = (1, 4)
+# Share of queries that hit a table purge_dead_code comments out
+DEAD_TABLE_RATE = 0.03
+# Share of source files that build their own client with createClient(
+CREATE_CLIENT_RATE = 0.03
+# Share of source files that already import the golden client
+GOLDEN_CLIENT_RATE = 0.10
+# Extra copies in _archived/ folders and *.bak files, relative to the file count
+ARCHIVED_RATE = 0.05
+BACKUP_RATE = 0.01
+# node_modules decoys at the root and under src/, relative to the file count
+NODE_MODULES_RATE = 0.25
+FILES_PER_DIR = 40
+
+TABLES = [
+    "leads", "quotes", "jobs", "expenses", "ckr_knowledge", "case_studies", "profiles",
+    "user_roles", "system_audit", "content_services", "content_suburbs", "content_blog_posts",
+    "content_case_studies", "content_testimonials", "inspection_reports", "quote_line_items",
+]
+DEAD_TABLES = ["chat_messages", "chat_conversations", "security_logs", "social_posts", "ai_action_log"]
+COLUMNS = ["id", "status", "created_at", "user_id", "slug", "suburb", "featured", "display_order"]
+
+# ---------------------------------------------------------------------------
+# Tree generation
+# ---------------------------------------------------------------------------
+
+def query_snippet(rng, name):
+    table = rng.choice(DEAD_TABLES) if rng.random() < DEAD_TABLE_RATE else rng.choice(TABLES)
+    verb = rng.choice(["select('*')", "select('id, status')", "insert(payload)", "update(payload)", "upsert(payload)", "delete()"])
+    column = rng.choice(COLUMNS)
+    return (
+        f"  const {{ data: {name}, error: {name}Error }} = await supabase\n"
+        f"    .from('{table}')\n"
+        f"    .{verb}\n"
+        f"    .eq('{column}', {name}Filter)\n"
+        f"    .order('{rng.choice(COLUMNS)}', {{ ascending: false }});\n"
+        f"  if ({name}Error) throw {name}Error;\n"
+    )
+
+def source_file(rng, index, tsx):
+    name = f"Feature{index}"
+    lines = []
+    uses_client = rng.random() < CREATE_CLIENT_RATE
+    if uses_client:
+        lines.append("import { createClient } from '@supabase/supabase-js';")
+    elif rng.random() < GOLDEN_CLIENT_RATE:
+        lines.append('import { supabase } from "@/lib/supabaseClient";')
+    else:
+        lines.append("import { supabase } from '@/integrations/supabase/client';")
+    if tsx:
+        lines.append("import { useEffect, useState } from 'react';")
+        lines.append("import { Card, CardContent } from '@/components/ui/card';")
+    lines.append(f"import {{ format{index % 7} }} from '@/lib/format';")
+    lines.append("")
+    if uses_client:
+        lines.append("const supabase = createClient(import.meta.env.VITE_SUPABASE_URL, import.meta.env.VITE_SUPABASE_ANON_KEY);")
+        lines.append("")
+
+    lines.append(f"export async function load{name}(filter: string) {{")
+    lines.append(f"  const query{index}Filter = filter;")
+    if rng.random() < QUERY_FILE_RATE:
+        for q in range(rng.randint(*QUERIES_PER_FILE)):
+            lines.append(f"  const q{q}Filter = query{index}Filter;")
+            lines.append(query_snippet(rng, f"q{q}"))
+    for i in range(rng.randint(3, 20)):
+        lines.append(f"  const value{i} = new Date().getTime() + {rng.randint(0, 10_000)};")
+        lines.append(f"  console.debug('{name} step {i}', value{i});")
+    lines.append("  return null;")
+    lines.append("}")
+
+    if tsx:
+        lines.append("")
+        lines.append(f"export default function {name}() {{")
+        lines.append("  const [items, setItems] = useState<unknown[]>([]);")
+        lines.append(f"  useEffect(() => {{ load{name}('all').then(() => setItems([])); }}, []);")
+        lines.append("  return (")
+        lines.append("    <Card>")
+        lines.append(f"      <CardContent>{{items.length}} {name.lower()} items</CardContent>")
+        lines.append("    </Card>")
+        lines.append("  );")
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def generate_tree(dest, num_files, seed=SEED):
+    """Write a reproducible tree with `num_files` scanned sources plus decoys."""
+    rng = random.Random(f"{seed}:{num_files}")
+    sources = []
+    for i in range(num_files):
+        tsx = rng.random() < 0.6
+        area = rng.choice(["components", "pages", "hooks", "lib", "features"])
+        directory = os.path.join(dest, "src", area, f"group{i // FILES_PER_DIR:04d}")
+        path = os.path.join(directory, f"{'Feature' if tsx else 'feature'}{i}.{'tsx' if tsx else 'ts'}")
+        content = source_file(rng, i, tsx)
+        write_file(path, content)
+        sources.append((path, content))
+
+    for n in range(int(num_files * ARCHIVED_RATE)):
+        path, content = rng.choice(sources)
+        relative = os.path.relpath(path, os.path.join(dest, "src"))
+        write_file(os.path.join(dest, "src", "_archived", f"batch{n // FILES_PER_DIR:03d}", relative), content)
+
+    for n in range(int(num_files * BACKUP_RATE)):
+        path, content = rng.choice(sources)
+        write_file(path + ".bak", content)
+
+    for n in range(int(num_files * NODE_MODULES_RATE)):
+        package = f"pkg{n // FILES_PER_DIR:04d}"
+        base = os.path.join(dest, "node_modules") if n % 2 else os.path.join(dest, "src", "vendor", "node_modules")
+        write_file(os.path.join(base, package, "dist", f"index{n}.js"), source_file(rng, n, False))
+
+    with open(os.path.join(dest, ".tree.json"), "w", encoding="utf-8") as f:
+        json.dump({"files": num_files, "seed": seed, "generator": GENERATOR_VERSION}, f)
+
+def ensure_tree(label, num_files, seed):
+    """Generate the tree for `label` once and reuse it on later runs."""
+    dest = os.path.join(TREES_DIR, f"{label}-{seed}")
+    marker = os.path.join(dest, ".tree.json")
+    try:
+        with open(marker, "r", encoding="utf-8") as f:
+            if json.load(f) == {"files": num_files, "seed": seed, "generator": GENERATOR_VERSION}:
+                return dest
+    except (OSError, ValueError):
+        pass
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    print(f"🌱 Generating {label} tree ({num_files} files)...")
+    start = time.perf_counter()
+    generate_tree(dest, num_files, seed)
+    print(f"   done in {time.perf_counter() - start:.1f}s")
+    return dest
+
+# ---------------------------------------------------------------------------
+# Running the tools
+# ---------------------------------------------------------------------------
+
+# Runs the tool as its only child and writes RUSAGE_CHILDREN's ru_maxrss to the
+# fd in argv[1]. That covers the tool and every process it waited for (the
+# worker pools of purge_dead_code and wire_frontend_client), reported as the
+# largest single process. Measured in a fresh process because the benchmark's
+# own RUSAGE_CHILDREN keeps the maximum over every earlier run.
+PEAK_RSS_WRAPPER = (
+    "import os, resource, subprocess, sys\n"
+    "code = subprocess.call(sys.argv[2:])\n"
+    "os.write(int(sys.argv[1]), str(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss).encode())\n"
+    "sys.exit(code)\n"
+)
+
+def run_tool(script, args, cwd, timeout=None):
+    """Run one tool to completion; returns (wall seconds, peak RSS in KiB, exit code).
+
+    Peak RSS is the largest process in the tool's process tree. Raises
+    subprocess.TimeoutExpired after killing the tree if it runs past `timeout`.
+    """
+    read_fd, write_fd = os.pipe()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", PEAK_RSS_WRAPPER, str(write_fd),
+         sys.executable, os.path.join(REPO_ROOT, script)] + args,
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        pass_fds=(write_fd,), start_new_session=True,
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd, "r") as report:
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+            proc.wait()
+            raise
+        wall = time.perf_counter() - start
+        max_rss = int(report.read() or 0)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak_kib = max_rss // 1024 if sys.platform == "darwin" else max_rss
+    return wall, peak_kib, proc.returncode
+
+def bench_tool(name, script, args, mutates, tree, num_files, repeat, timeout=None):
+    runs = []
+    for n in range(WARMUP_RUNS + repeat):
+        # Rewriting tools get a fresh copy each time so every run has the same work to do
+        workdir = tree
+        if mutates:
+            workdir = tree + ".work"
+            if os.path.isdir(workdir):
+                shutil.rmtree(workdir)
+            shutil.copytree(tree, workdir)
+        try:
+            wall, peak_kib, code = run_tool(script, args, workdir, timeout)
+        except subprocess.TimeoutExpired:
+            return {"tool": name, "files": num_files, "timed_out_seconds": timeout}
+        finally:
+            if mutates:
+                shutil.rmtree(workdir)
+        if code != 0:
+            raise RuntimeError(f"{name} exited with status {code} on {tree}")
+        if n >= WARMUP_RUNS:
+            runs.append({"wall_seconds": round(wall, 4), "peak_rss_kib": peak_kib})
+
+    median = statistics.median(r["wall_seconds"] for r in runs)
+    return {
+        "tool": name,
+        "files": num_files,
+        "runs": runs,
+        "wall_seconds_median": round(median, 4),
+        "files_per_second": round(num_files / median, 1) if median else None,
+        "peak_rss_kib": max(r["peak_rss_kib"] for r in runs),
+    }
+
+def git_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {(r["size"], r["tool"]): r for r in baseline["results"]}
+    print("\n" + "="*40)
+    print(f"📈 COMPARED WITH {(baseline.get('commit') or 'unknown')[:12]}")
+    print("="*40)
+    for r in results:
+        before = old.get((r["size"], r["tool"]))
+        if not before or "timed_out_seconds" in before or "timed_out_seconds" in r:
+            continue
+        speedup = before["wall_seconds_median"] / r["wall_seconds_median"] if r["wall_seconds_median"] else float("inf")
+        memory = r["peak_rss_kib"] / before["peak_rss_kib"] if before["peak_rss_kib"] else float("inf")
+        marker = "🟢" if speedup >= 1.05 else "🔴" if speedup <= 0.95 else "⚪"
+        print(f"  {marker} {r['size']:>5} {r['tool']:<22} {before['wall_seconds_median']:.3f}s -> {r['wall_seconds_median']:.3f}s "
+              f"(x{speedup:.2f} speed, x{memory:.2f} memory)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the codebase scanners on synthetic trees.")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES),
+                        help=f"comma-separated tree sizes from {', '.join(SIZES)} (default: {','.join(DEFAULT_SIZES)})")
+    parser.add_argument("--tools", default=",".join(t[0] for t in TOOLS), help="comma-separated tools to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per tool and size; the median wall time is reported (default: 3)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help=f"seconds before a tool run is killed and reported as timed out, 0 for none (default: {TIMEOUT})")
+    parser.add_argument("--seed", type=int, default=SEED, help=f"tree generator seed (default: {SEED})")
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="print the change against an earlier results file")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    tools = [t.strip() for t in args.tools.split(",") if t.strip()]
+    unknown = [s for s in sizes if s not in SIZES] + [t for t in tools if t not in {t[0] for t in TOOLS}]
+    if unknown:
+        parser.error(f"unknown size/tool: {', '.join(unknown)}")
+
+    commit, dirty = git_commit()
+    print(f"⏱️  Benchmarking {', '.join(tools)} at {commit[:12] if commit else 'unknown commit'}{' (dirty)' if dirty else ''}")
+
+    results = []
+    for size in sizes:
+        tree = ensure_tree(size, SIZES[size], args.seed)
+        for name, script, extra, mutates in TOOLS:
+            if name not in tools:
+                continue
+            result = bench_tool(name, script, extra, mutates, tree, SIZES[size], args.repeat, args.timeout or None)
+            result["size"] = size
+            results.append(result)
+            if "timed_out_seconds" in result:
+                print(f"  ⏰ {size:>5} {name:<22} timed out after {args.timeout:g}s")
+                continue
+            print(f"  📊 {size:>5} {name:<22} {result['wall_seconds_median']:8.3f}s  "
+                  f"{result['files_per_second']:>10} files/s  {result['peak_rss_kib'] / 1024:7.1f} MiB peak")
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "generator": GENERATOR_VERSION,
+        "repeat": args.repeat,
+        "warmup_runs": WARMUP_RUNS,
+        "timeout_seconds": args.timeout or None,
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{(commit or 'unknown')[:12]}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to: {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
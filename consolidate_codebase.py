@@ -1,6 +1,9 @@
+import argparse
 import os
 import shutil
 
+import profiling
+
 ROOT_DIR = "."
 ARCHIVED_DIR = "_archived"
 
@@ -105,8 +108,15 @@ def create_golden_files():
         print("   ⚠️  src/lib/supabaseClient.ts already exists. (Skipped overwrite)")
 
 def main():
-    clean_archived_duplicates()
-    create_golden_files()
+    parser = argparse.ArgumentParser(description="Delete archived duplicates and create the golden source files.")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.profiled("consolidate_codebase", args.profile):
+        with profiling.span("walk"):
+            clean_archived_duplicates()
+        with profiling.span("write"):
+            create_golden_files()
     
     print("\n" + "="*40)
     print("🚀 CONSOLIDATION COMPLETE")
@@ -0,0 +1,113 @@
+import json
+import os
+import subprocess
+
+# Shared helpers for the scanners' --since mode.
+#
+# Results are cached per git blob id, so the baseline at <ref> only needs the
+# blobs that are new since the last run, and the working tree only needs the
+# files `git diff` reports as changed. Files come from git, not os.walk: what
+# is tracked at <ref> plus untracked files that are not ignored, so git-ignored
+# files (build output, local copies) are left out of --since scans.
+
+ROOT_DIR = "."
+CACHE_DIR = ".scan_cache"
+
+def git(*args, root_dir=ROOT_DIR, input=None):
+    result = subprocess.run(
+        ["git", *args],
+        cwd=root_dir,
+        input=input,
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+def resolve_ref(ref, root_dir=ROOT_DIR):
+    return git("rev-parse", "--verify", f"{ref}^{{commit}}", root_dir=root_dir).decode().strip()
+
+def split_paths(output):
+    return [p for p in output.decode('utf-8', 'surrogateescape').split('\0') if p]
+
+def changed_files(ref, root_dir=ROOT_DIR):
+    """Tracked files that differ from <ref> in the working tree, plus new untracked files.
+
+    Paths are relative to root_dir, like `ls-tree` and `ls-files` report them.
+    Renames are listed as delete + add so the old path leaves the baseline.
+    """
+    changed = split_paths(git("diff", "--name-only", "--no-renames", "--relative", "-z", ref, "--", root_dir=root_dir))
+    changed += split_paths(git("ls-files", "--others", "--exclude-standard", "-z", root_dir=root_dir))
+    return sorted(set(changed))
+
+def tree_blobs(ref, root_dir=ROOT_DIR):
+    """Map path -> blob id for every file in <ref>."""
+    blobs = {}
+    for entry in split_paths(git("ls-tree", "-r", "-z", ref, root_dir=root_dir)):
+        meta, path = entry.split('\t', 1)
+        _, kind, blob_id = meta.split()
+        if kind == 'blob':
+            blobs[path] = blob_id
+    return blobs
+
+def read_blobs(blob_ids, root_dir=ROOT_DIR):
+    """Yield (blob_id, text) for each blob using one `git cat-file --batch` process."""
+    if not blob_ids:
+        return
+    output = git("cat-file", "--batch", root_dir=root_dir, input="\n".join(blob_ids).encode() + b"\n")
+    offset = 0
+    while offset < len(output):
+        header_end = output.index(b"\n", offset)
+        blob_id, _, size = output[offset:header_end].decode().split()
+        start = header_end + 1
+        yield blob_id, output[start:start + int(size)].decode('utf-8', 'ignore')
+        offset = start + int(size) + 1
+
+def load_cache(tool, root_dir=ROOT_DIR):
+    path = os.path.join(root_dir, CACHE_DIR, f"{tool}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(tool, cache, root_dir=ROOT_DIR):
+    cache_dir = os.path.join(root_dir, CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{tool}.json")
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(path + ".tmp", path)
+
+def scan_since(tool, ref, include, analyze, root_dir=ROOT_DIR):
+    """Return ({path: result}, changed_paths) for the working tree.
+
+    `include(path)` selects which files the tool cares about and
+    `analyze(path, content)` produces a JSON-serialisable result for one file.
+    Unchanged files reuse the cached result for their blob at <ref>.
+    """
+    sha = resolve_ref(ref, root_dir)
+    baseline = {p: b for p, b in tree_blobs(sha, root_dir).items() if include(p)}
+
+    cache = load_cache(tool, root_dir)
+    missing = sorted({b for b in baseline.values() if b not in cache})
+    paths_by_blob = {}
+    for path, blob_id in baseline.items():
+        paths_by_blob.setdefault(blob_id, path)
+    for blob_id, content in read_blobs(missing, root_dir):
+        cache[blob_id] = analyze(paths_by_blob[blob_id], content)
+
+    # Drop blobs that are no longer reachable from the baseline
+    live = set(baseline.values())
+    save_cache(tool, {b: r for b, r in cache.items() if b in live}, root_dir)
+
+    results = {path: cache[blob_id] for path, blob_id in baseline.items()}
+    changed = [p for p in changed_files(sha, root_dir) if include(p)]
+    for path in changed:
+        full_path = os.path.join(root_dir, path)
+        if os.path.isfile(full_path):
+            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                results[path] = analyze(path, f.read())
+        else:
+            results.pop(path, None)
+
+    return results, changed
@@ -0,0 +1,148 @@
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Shared --profile support for the scanners, codemods and the Notion sync.
+#
+# `profiled(tool, out_dir)` wraps a run in cProfile and tracemalloc, and
+# `span(name)` times one phase of the work (walk, read, match, fetch,
+# extract, upsert, log). When the run ends, three files are written to
+# out_dir:
+#
+#   <tool>-<stamp>.pstats        cProfile stats (python -m pstats, snakeviz)
+#   <tool>-<stamp>-alloc.txt     top allocation sites by size
+#   <tool>-<stamp>-trace.json    spans as Chrome trace events (chrome://tracing,
+#                                ui.perfetto.dev, speedscope)
+#
+# Without an active session span() returns a shared no-op context, so the
+# hooks cost next to nothing on normal runs. cProfile only sees the main
+# thread and neither cProfile nor spans follow worker processes.
+
+PROFILE_DIR = ".profile"
+ALLOC_TOP = 25
+TRACEMALLOC_FRAMES = 10
+
+_session = None
+_NO_SPAN = nullcontext()
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIR, metavar="DIR",
+                        help=f"profile the run and write pstats, allocation and trace files to DIR (default: {PROFILE_DIR})")
+
+class ProfileSession:
+    def __init__(self, tool, out_dir):
+        self.tool = tool
+        self.out_dir = out_dir
+        self.prefix = os.path.join(out_dir, f"{tool}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.events = []
+        self.thread_names = {}
+        self.lock = threading.Lock()
+        self.profiler = cProfile.Profile()
+        self.started_ns = time.perf_counter_ns()
+
+    def record(self, name, started_ns, ended_ns, args):
+        event = {
+            "name": name,
+            "cat": self.tool,
+            "ph": "X",
+            "ts": (started_ns - self.started_ns) / 1000,
+            "dur": (ended_ns - started_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+            self.thread_names.setdefault(event["tid"], threading.current_thread().name)
+
+    def start(self):
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.profiler.dump_stats(f"{self.prefix}.pstats")
+        self.write_alloc_report(snapshot, current, peak)
+        self.write_trace()
+        return self.span_totals(), peak
+
+    def write_alloc_report(self, snapshot, current, peak):
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+        lines = [
+            f"Top {ALLOC_TOP} allocation sites for {self.tool}",
+            f"Peak traced memory: {peak / 1024:.1f} KiB, still allocated at exit: {current / 1024:.1f} KiB",
+            "",
+        ]
+        for n, stat in enumerate(snapshot.statistics("traceback")[:ALLOC_TOP], 1):
+            lines.append(f"#{n}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            for line in stat.traceback.format(limit=3, most_recent_first=True):
+                lines.append(f"    {line.strip()}")
+        with open(f"{self.prefix}-alloc.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def write_trace(self):
+        # Name each thread that recorded spans (the sync pipeline's stage threads are gone by now)
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                 for tid, name in self.thread_names.items()]
+        with open(f"{self.prefix}-trace.json", "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": names + self.events, "displayTimeUnit": "ms"}, f)
+
+    def span_totals(self):
+        """{span name: (count, total seconds)}, slowest first."""
+        totals = {}
+        for event in self.events:
+            count, seconds = totals.get(event["name"], (0, 0.0))
+            totals[event["name"]] = (count + 1, seconds + event["dur"] / 1e6)
+        return dict(sorted(totals.items(), key=lambda item: -item[1][1]))
+
+@contextmanager
+def _timed(session, name, args):
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        session.record(name, started, time.perf_counter_ns(), args)
+
+def span(name, **args):
+    """Time a phase of the run; a no-op unless a profiled() session is active."""
+    session = _session
+    if session is None:
+        return _NO_SPAN
+    return _timed(session, name, args)
+
+@contextmanager
+def profiled(tool, out_dir):
+    """Profile the enclosed run when out_dir is set (the --profile value)."""
+    global _session
+    if not out_dir:
+        yield
+        return
+
+    session = ProfileSession(tool, out_dir)
+    _session = session
+    session.start()
+    try:
+        with span(tool):
+            yield
+    finally:
+        _session = None
+        totals, peak = session.stop()
+        print(f"\n🔬 Profile for {tool} written to {session.prefix}.pstats, -alloc.txt and -trace.json")
+        print(f"   Peak traced memory: {peak / (1024 * 1024):.1f} MiB")
+        for name, (count, seconds) in totals.items():
+            print(f"   {name:<22} {count:>8} spans  {seconds:10.3f}s")
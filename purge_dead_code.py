@@ -1,6 +1,11 @@
+import argparse
 import os
 import re
 
+import git_scope
+import profiling
+import rewrite_engine
+
 # --- CONFIGURATION ---
 ROOT_DIR = "."
 EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx'}
@@ -14,66 +19,95 @@ DEAD_TABLES = [
     "security_scan_results", "voice_transcriptions", "social_posts"
 ]
 
-def process_file(file_path):
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = f.readlines()
+# Regex to find the table name inside quotes: 'table_name' or "table_name"
+# We use \b boundary checks to avoid partial matches
+PATTERNS = [re.compile(f"['\"]{table}['\"]") for table in DEAD_TABLES]
 
+def purge_content(content):
+    """Comment out every line that references a dead table."""
     new_lines = []
-    modified = False
-    
-    # Regex to find the table name inside quotes: 'table_name' or "table_name"
-    # We use \b boundary checks to avoid partial matches
-    patterns = [re.compile(f"['\"]{table}['\"]") for table in DEAD_TABLES]
 
-    for line in lines:
+    for line in content.split('\n'):
         # Skip lines that are already commented
         if line.strip().startswith("//") or line.strip().startswith("{/*"):
             new_lines.append(line)
             continue
 
         match_found = False
-        for pattern in patterns:
+        for pattern in PATTERNS:
             if pattern.search(line):
                 # Found a dead table! Comment it out.
                 new_lines.append(f"// [AUTO-PURGE] {line}")
                 match_found = True
-                modified = True
                 break # Move to next line
         
         if not match_found:
             new_lines.append(line)
 
-    if modified:
-        print(f"   ✂️ Patching: {file_path}")
-        # 1. Create Backup
-        with open(file_path + ".bak", 'w', encoding='utf-8') as f:
-            f.writelines(lines)
-        # 2. Overwrite Original
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.writelines(new_lines)
+    return '\n'.join(new_lines)
+
+def is_scanned_path(path):
+    directory, file = os.path.split(path)
+    if 'node_modules' in directory or '.git' in directory:
+        return False
+    _, ext = os.path.splitext(file)
+    return ext in EXTENSIONS
+
+def changed_paths_since(ref):
+    # Unchanged files were already purged on a previous run, so only the
+    # diff needs visiting; there are no per-file results to merge back in.
+    changed = git_scope.changed_files(git_scope.resolve_ref(ref, ROOT_DIR), ROOT_DIR)
+    return [os.path.join(ROOT_DIR, p) for p in changed
+            if is_scanned_path(p) and os.path.isfile(os.path.join(ROOT_DIR, p))]
 
 def main():
+    parser = argparse.ArgumentParser(description="Comment out code that still references dropped tables.")
+    parser.add_argument("--since", metavar="REF", help="only visit files changed since the git ref REF")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--rollback", nargs="?", const="latest", metavar="RUN_ID", help="undo the latest purge run, or RUN_ID")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.profiled("purge_dead_code", args.profile):
+        run(args)
+
+def run(args):
+    if args.rollback:
+        run_id, restored = rewrite_engine.rollback("purge_dead_code", None if args.rollback == "latest" else args.rollback)
+        if run_id is None:
+            print("🤷 No purge run to roll back.")
+        else:
+            print(f"⏪ Rolled back {run_id}: restored {len(restored)} files.")
+        return
+
     print(f"🚀 Starting Code Purge in: {os.path.abspath(ROOT_DIR)}")
     print(f"🎯 Targeting {len(DEAD_TABLES)} dead tables...")
     
-    count = 0
-    for root, dirs, files in os.walk(ROOT_DIR):
-        if 'node_modules' in root or '.git' in root:
-            continue
-            
-        for file in files:
-            _, ext = os.path.splitext(file)
-            if ext in EXTENSIONS:
-                process_file(os.path.join(root, file))
-                count += 1
+    with profiling.span("walk"):
+        if args.since:
+            paths = changed_paths_since(args.since)
+        else:
+            paths = []
+            for root, dirs, files in os.walk(ROOT_DIR):
+                if 'node_modules' in root or '.git' in root:
+                    continue
+                    
+                for file in files:
+                    _, ext = os.path.splitext(file)
+                    if ext in EXTENSIONS:
+                        paths.append(os.path.join(root, file))
+
+    run_id, changed = rewrite_engine.run_rewrites("purge_dead_code", paths, purge_content, args.workers)
+    for path in changed:
+        print(f"   ✂️ Patched: {path}")
 
     print("\n" + "="*40)
     print(f"✅ PURGE COMPLETE")
-    print(f"📊 Scanned {count} files.")
-    print("👉 Modified files have a .bak backup next to them.")
+    print(f"📊 Scanned {len(paths)} files, modified {len(changed)}.")
+    if run_id:
+        print(f"👉 Undo with: python purge_dead_code.py --rollback {run_id}")
     print("👉 Search for '[AUTO-PURGE]' in your editor to see what was removed.")
     print("="*40)
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import profiling
+
+# Shared rewrite engine for the codemod scripts.
+#
+# A run computes every edit in parallel, records the original bytes of each
+# file it is about to change in a single journal, then swaps the new content
+# in with temp file + rename. Files whose output is byte-identical are never
+# touched. `rollback()` restores the originals from the journal.
+
+JOURNAL_DIR = ".rewrite_journal"
+JOURNAL_FILE = "journal.json"
+# Oldest runs beyond this are pruned when a new run is recorded
+JOURNAL_KEEP = 20
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def compute_edit(job):
+    """Worker: apply `transform` to one file and return its new bytes if they differ."""
+    path, transform = job
+    try:
+        with open(path, 'rb') as f:
+            original = f.read()
+    except OSError:
+        return path, None, None
+    # surrogateescape keeps undecodable bytes intact through the round trip
+    content = original.decode('utf-8', 'surrogateescape')
+    updated = transform(content).encode('utf-8', 'surrogateescape')
+    if updated == original:
+        return path, None, None
+    return path, original, updated
+
+def atomic_write(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rewrite-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_journal(run_dir, journal):
+    data = json.dumps(journal, indent=2).encode('utf-8')
+    atomic_write(os.path.join(run_dir, JOURNAL_FILE), data)
+
+def load_journal(run_dir):
+    with open(os.path.join(run_dir, JOURNAL_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def list_runs(tool=None):
+    """Run ids, oldest first, optionally limited to one tool."""
+    if not os.path.isdir(JOURNAL_DIR):
+        return []
+    runs = []
+    for run_id in sorted(os.listdir(JOURNAL_DIR)):
+        if tool is None or run_id.endswith(f"-{tool}"):
+            if os.path.isfile(os.path.join(JOURNAL_DIR, run_id, JOURNAL_FILE)):
+                runs.append(run_id)
+    return runs
+
+def prune_journal():
+    runs = list_runs()
+    for run_id in runs[:-JOURNAL_KEEP]:
+        run_dir = os.path.join(JOURNAL_DIR, run_id)
+        for root, dirs, files in os.walk(run_dir, topdown=False):
+            for file in files:
+                os.remove(os.path.join(root, file))
+            os.rmdir(root)
+
+def run_rewrites(tool, paths, transform, workers=None):
+    """Rewrite `paths` with `transform(content) -> content`.
+
+    `transform` must be a module-level function so it can be sent to worker
+    processes. Returns (run_id, changed_paths); run_id is None when nothing
+    needed writing.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+
+    edits = []
+    # Reading and transforming happen in the workers, so this span covers both
+    with profiling.span("match", files=len(paths)), ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, original, updated in pool.map(compute_edit, [(p, transform) for p in paths], chunksize=chunksize):
+            if updated is not None:
+                edits.append((path, original, updated))
+
+    if not edits:
+        return None, []
+
+    run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{tool}"
+    run_dir = os.path.join(JOURNAL_DIR, run_id)
+    os.makedirs(os.path.join(run_dir, "originals"))
+
+    # Record every original before the first write so an interrupted run
+    # can always be rolled back.
+    journal = {
+        'run_id': run_id,
+        'tool': tool,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'status': 'in_progress',
+        'entries': [],
+    }
+    for n, (path, original, updated) in enumerate(edits):
+        backup = os.path.join("originals", str(n))
+        with open(os.path.join(run_dir, backup), 'wb') as f:
+            f.write(original)
+        journal['entries'].append({
+            'path': os.path.abspath(path),
+            'backup': backup,
+            'original_sha256': sha256(original),
+            'new_sha256': sha256(updated),
+        })
+    write_journal(run_dir, journal)
+
+    changed = []
+    with profiling.span("write", files=len(edits)):
+        for entry, (path, original, updated) in zip(journal['entries'], edits):
+            # Leave files alone if someone edited them while we were computing
+            with open(path, 'rb') as f:
+                if sha256(f.read()) != entry['original_sha256']:
+                    print(f"   ⚠️  Skipping {path}: changed during the run")
+                    continue
+            atomic_write(path, updated)
+            changed.append(path)
+
+    journal['status'] = 'complete'
+    write_journal(run_dir, journal)
+    prune_journal()
+    return run_id, changed
+
+def rollback(tool=None, run_id=None):
+    """Restore the files changed by `run_id` (default: the tool's latest run).
+
+    Returns (run_id, restored_paths) or (None, []) when there is nothing to undo.
+    """
+    if run_id is None:
+        runs = [r for r in list_runs(tool) if load_journal(os.path.join(JOURNAL_DIR, r))['status'] != 'rolled_back']
+        if not runs:
+            return None, []
+        run_id = runs[-1]
+    else:
+        available = list_runs(tool)
+        if run_id not in available:
+            print(f"   ⚠️  No journal for run {run_id}.")
+            print(f"   Available runs: {', '.join(available) if available else '(none)'}")
+            return None, []
+
+    run_dir = os.path.join(JOURNAL_DIR, run_id)
+    journal = load_journal(run_dir)
+    restored = []
+    for entry in journal['entries']:
+        path = entry['path']
+        try:
+            with open(path, 'rb') as f:
+                current = sha256(f.read())
+        except OSError:
+            current = None
+        if current == entry['original_sha256']:
+            continue
+        if current != entry['new_sha256']:
+            print(f"   ⚠️  Not restoring {path}: modified after the run")
+            continue
+        with open(os.path.join(run_dir, entry['backup']), 'rb') as f:
+            atomic_write(path, f.read())
+        restored.append(path)
+
+    journal['status'] = 'rolled_back'
+    write_journal(run_dir, journal)
+    return run_id, restored
@@ -1,5 +1,12 @@
+import argparse
+import bisect
 import os
 import re
+import sqlite3
+import time
+
+import git_scope
+import profiling
 
 # --- CONFIGURATION ---
 # The folder to scan (current folder)
@@ -13,45 +20,499 @@ EXPECTED_TABLES = {
     "case_studies", "profiles", "user_roles", "system_audit"
 }
 
+# --- TABLE USAGE INDEX ---
+# Folders covered by the queryable index (see --index / --lookup)
+INDEX_ROOTS = ["src", "supabase/functions"]
+INDEX_EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx', '.sql'}
+INDEX_DB = ".table_usage_index.sqlite"
+
+# .from('table') followed by its query verb somewhere further down the chain
+FROM_CALL = re.compile(r"(storage\s*)?\.from\s*\(\s*['\"`]([a-zA-Z0-9_]+)['\"`]\s*\)")
+CHAIN_VERB = re.compile(r"\.(select|insert|update|upsert|delete)\s*\(")
+RPC_CALL = re.compile(r"\.rpc\s*\(\s*['\"`]([a-zA-Z0-9_]+)['\"`]")
+# Raw SQL only counts upper-case keywords so JS `import x from 'y'` is ignored
+RAW_SQL = re.compile(r"\b(?:DELETE\s+FROM|INSERT\s+INTO|UPDATE|FROM|JOIN)\s+(?:ONLY\s+)?(?:public\.)?\"?([a-z_][a-z0-9_]*)")
+# How far down a query builder chain we look for the verb
+CHAIN_WINDOW = 400
+
+# --- MISSING INDEX ADVISOR ---
+# DDL sources, applied in this order to build the index catalog
+SCHEMA_FILES = ["schema/supabase_schema.sql"]
+MIGRATIONS_DIR = "supabase/migrations"
+
+# PostgREST filters that take the column as their first argument
+FILTER_CALL = re.compile(r"\.(eq|neq|gt|gte|lt|lte|like|ilike|is|in|contains|containedBy|overlaps|textSearch|filter|not|order)\s*\(\s*['\"`]([a-zA-Z0-9_]+)['\"`]")
+MATCH_CALL = re.compile(r"\.match\s*\(\s*\{([^}]*)\}")
+MATCH_KEY = re.compile(r"['\"]?([a-zA-Z0-9_]+)['\"]?\s*:")
+OR_CALL = re.compile(r"\.or\s*\(\s*['\"`]([^'\"`]*)['\"`]")
+OR_CONDITION = re.compile(r"(?:^|[,(])([a-zA-Z0-9_]+)\.(?:not\.)?[a-z]+\.")
+
+SQL_IDENT = r'(?:"?[a-zA-Z0-9_]+"?\.)?"?([a-zA-Z0-9_]+)"?'
+CREATE_TABLE = re.compile(r"\bCREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?" + SQL_IDENT + r"\s*\(", re.IGNORECASE)
+CREATE_INDEX = re.compile(
+    r"\bCREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?:\"?([a-zA-Z0-9_]+)\"?\s+)?"
+    r"ON\s+(?:ONLY\s+)?" + SQL_IDENT + r"\s*(?:USING\s+\w+\s*)?\(", re.IGNORECASE)
+ADD_CONSTRAINT = re.compile(
+    r"\bALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?" + SQL_IDENT +
+    r"\s+ADD\s+(?:CONSTRAINT\s+\"?([a-zA-Z0-9_]+)\"?\s+)?(?:PRIMARY\s+KEY|UNIQUE)\s*\(([^)]*)\)", re.IGNORECASE)
+ADD_COLUMN_KEY = re.compile(
+    r"\bALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?" + SQL_IDENT +
+    r"\s+ADD\s+COLUMN\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?([a-zA-Z0-9_]+)\"?[^;,]*?\b(PRIMARY\s+KEY|UNIQUE)\b", re.IGNORECASE)
+DROP_INDEX = re.compile(r"\bDROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?([^;]+)", re.IGNORECASE)
+DROP_TABLE = re.compile(r"\bDROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?" + SQL_IDENT, re.IGNORECASE)
+DDL_STATEMENT = re.compile("|".join(f"(?P<{name}>{pattern.pattern})" for name, pattern in [
+    ("create_table", CREATE_TABLE), ("create_index", CREATE_INDEX), ("add_constraint", ADD_CONSTRAINT),
+    ("add_column_key", ADD_COLUMN_KEY), ("drop_index", DROP_INDEX), ("drop_table", DROP_TABLE),
+]), re.IGNORECASE)
+SQL_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+TABLE_KEY = re.compile(r"^\s*(?:CONSTRAINT\s+\"?([a-zA-Z0-9_]+)\"?\s+)?(PRIMARY\s+KEY|UNIQUE)\s*\(([^)]*)\)", re.IGNORECASE)
+COLUMN_KEY = re.compile(r"^\s*\"?([a-zA-Z0-9_]+)\"?\s+.*?\b(PRIMARY\s+KEY|UNIQUE)\b", re.IGNORECASE | re.DOTALL)
+
+# Regex to find .from('table') or from "table"
+# Matches: .from('leads') OR from "leads" (SQL)
+TABLE_PATTERN = re.compile(r"[\.\s]from\s*\(\s*['\"]([a-zA-Z0-9_]+)['\"]\s*\)|from\s+['\"]?([a-zA-Z0-9_]+)['\"]?", re.IGNORECASE)
+
+def tables_in_content(content):
+    tables = set()
+    for match in TABLE_PATTERN.findall(content):
+        # Regex groups can be empty, find the valid one
+        table_name = match[0] if match[0] else match[1]
+        if table_name and len(table_name) > 2:
+            # Filter out common false positives if any
+            if table_name not in ['react', 'supabase']:
+                tables.add(table_name)
+    return tables
+
+def is_scanned_path(path):
+    # Skip node_modules and hidden folders
+    directory, file = os.path.split(path)
+    if 'node_modules' in directory or '.git' in directory:
+        return False
+    _, ext = os.path.splitext(file)
+    return ext in EXTENSIONS
+
 def find_table_usages(root_dir):
     used_tables = set()
-    
-    # Regex to find .from('table') or from "table"
-    # Matches: .from('leads') OR from "leads" (SQL)
-    pattern = re.compile(r"[\.\s]from\s*\(\s*['\"]([a-zA-Z0-9_]+)['\"]\s*\)|from\s+['\"]?([a-zA-Z0-9_]+)['\"]?", re.IGNORECASE)
 
     print(f"🕵️  Scanning codebase in {os.path.abspath(root_dir)}...")
 
-    for root, dirs, files in os.walk(root_dir):
-        # Skip node_modules and hidden folders
-        if 'node_modules' in root or '.git' in root:
+    paths = []
+    with profiling.span("walk"):
+        for root, dirs, files in os.walk(root_dir):
+            # Skip node_modules and hidden folders
+            if 'node_modules' in root or '.git' in root:
+                continue
+                
+            for file in files:
+                _, ext = os.path.splitext(file)
+                if ext in EXTENSIONS:
+                    paths.append(os.path.join(root, file))
+
+    for path in paths:
+        try:
+            with profiling.span("read"):
+                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
+            with profiling.span("match"):
+                used_tables |= tables_in_content(content)
+        except Exception as e:
+            pass # Skip unreadable files
+
+    return used_tables
+
+def find_table_usages_since(ref):
+    """Like find_table_usages, but only re-reads files changed since <ref>.
+
+    The file set comes from git (files tracked at <ref> plus untracked files
+    that are not ignored), so git-ignored files such as build output are not
+    scanned, while the full os.walk scan still reads them.
+    """
+    print(f"🕵️  Scanning files changed since {ref} in {os.path.abspath(ROOT_DIR)}...")
+
+    results, changed = git_scope.scan_since(
+        "scan_db_usage", ref, is_scanned_path,
+        lambda path, content: sorted(tables_in_content(content)),
+    )
+    print(f"   {len(changed)} changed files rescanned, {len(results)} files in total")
+
+    used_tables = set()
+    for tables in results.values():
+        used_tables.update(tables)
+    return used_tables
+
+def line_of(newlines, pos):
+    return bisect.bisect_left(newlines, pos) + 1
+
+def is_commented(content, pos):
+    line_start = content.rfind('\n', 0, pos) + 1
+    stripped = content[line_start:pos].lstrip()
+    return stripped.startswith('//') or stripped.startswith('--') or stripped.startswith('*')
+
+def iter_query_chains(content):
+    """Yield (table, pos, chain) for every live .from('table') call.
+
+    chain is the rest of the query builder expression: the text up to the
+    end of the statement or the next .from(), capped at CHAIN_WINDOW chars.
+    """
+    for match in FROM_CALL.finditer(content):
+        # supabase.storage.from('bucket') addresses a bucket, not a table
+        if match.group(1) or is_commented(content, match.start()):
             continue
-            
-        for file in files:
-            _, ext = os.path.splitext(file)
-            if ext in EXTENSIONS:
-                path = os.path.join(root, file)
-                try:
+        chain = content[match.end():match.end() + CHAIN_WINDOW]
+        for terminator in ('.from(', ';'):
+            end = chain.find(terminator)
+            if end != -1:
+                chain = chain[:end]
+        yield match.group(2), match.start(), chain
+
+def extract_table_accesses(content):
+    """Return (table, line, kind) tuples for every table access in a file.
+
+    kind is the PostgREST verb (select/insert/update/upsert/delete), 'from'
+    when the chain has no verb, 'rpc' for stored procedure calls or 'sql'
+    for raw SQL statements. Commented-out lines are ignored.
+    """
+    newlines = [i for i, ch in enumerate(content) if ch == '\n']
+    accesses = []
+
+    for table, pos, chain in iter_query_chains(content):
+        verb = CHAIN_VERB.search(chain)
+        kind = verb.group(1) if verb else 'from'
+        accesses.append((table, line_of(newlines, pos), kind))
+
+    for match in RPC_CALL.finditer(content):
+        if not is_commented(content, match.start()):
+            accesses.append((match.group(1), line_of(newlines, match.start()), 'rpc'))
+
+    for match in RAW_SQL.finditer(content):
+        if not is_commented(content, match.start()):
+            accesses.append((match.group(1), line_of(newlines, match.start()), 'sql'))
+
+    return accesses
+
+def open_index(db_path=INDEX_DB):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS usages (
+            table_name TEXT NOT NULL,
+            path TEXT NOT NULL,
+            line INTEGER NOT NULL,
+            kind TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_usages_table ON usages(table_name);
+        CREATE INDEX IF NOT EXISTS idx_usages_path ON usages(path);
+    """)
+    return conn
+
+def iter_index_files(roots=INDEX_ROOTS):
+    for root_dir in roots:
+        for root, dirs, files in os.walk(root_dir):
+            dirs[:] = [d for d in dirs if d != 'node_modules' and not d.startswith('.')]
+            for file in files:
+                _, ext = os.path.splitext(file)
+                if ext in INDEX_EXTENSIONS:
+                    yield os.path.join(root, file)
+
+def update_index(conn, roots=INDEX_ROOTS):
+    """Bring the index up to date, re-reading only new or modified files.
+
+    Returns (rescanned, removed) file counts.
+    """
+    known = {path: (mtime, size) for path, mtime, size in conn.execute("SELECT path, mtime_ns, size FROM files")}
+    seen = set()
+    rescanned = 0
+
+    with profiling.span("walk"):
+        paths = list(iter_index_files(roots))
+
+    with conn:
+        for path in paths:
+            seen.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.get(path) == (st.st_mtime_ns, st.st_size):
+                continue
+
+            try:
+                with profiling.span("read"):
                     with open(path, 'r', encoding='utf-8', errors='ignore') as f:
                         content = f.read()
-                        
-                    # Find all matches
-                    matches = pattern.findall(content)
-                    for match in matches:
-                        # Regex groups can be empty, find the valid one
-                        table_name = match[0] if match[0] else match[1]
-                        if table_name and len(table_name) > 2:
-                            # Filter out common false positives if any
-                            if table_name not in ['react', 'supabase']:
-                                used_tables.add(table_name)
-                                
-                except Exception as e:
-                    pass # Skip unreadable files
+            except OSError:
+                continue
 
-    return used_tables
+            with profiling.span("match"):
+                accesses = extract_table_accesses(content)
+            conn.execute("DELETE FROM usages WHERE path = ?", (path,))
+            conn.executemany(
+                "INSERT INTO usages (table_name, path, line, kind) VALUES (?, ?, ?, ?)",
+                [(table, path, line, kind) for table, line, kind in accesses]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                (path, st.st_mtime_ns, st.st_size)
+            )
+            rescanned += 1
+
+        removed = [path for path in known if path not in seen]
+        for path in removed:
+            conn.execute("DELETE FROM usages WHERE path = ?", (path,))
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    return rescanned, len(removed)
+
+def lookup_table(conn, table, kind=None):
+    query = "SELECT path, line, kind FROM usages WHERE table_name = ?"
+    params = [table]
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    return conn.execute(query + " ORDER BY path, line", params).fetchall()
+
+def table_summary(conn):
+    return conn.execute("""
+        SELECT table_name, COUNT(DISTINCT path), COUNT(*)
+        FROM usages GROUP BY table_name ORDER BY COUNT(*) DESC, table_name
+    """).fetchall()
+
+def run_index_cli(args):
+    conn = open_index(args.db)
+    if not args.no_refresh:
+        started = time.perf_counter()
+        rescanned, removed = update_index(conn)
+        if args.index:
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"🗂️  Index updated: {rescanned} files rescanned, {removed} removed ({elapsed:.0f} ms)")
+
+    if args.lookup:
+        started = time.perf_counter()
+        rows = lookup_table(conn, args.lookup, args.kind)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"🔎 {args.lookup}: {len(rows)} usages ({elapsed:.1f} ms)")
+        for path, line, kind in rows:
+            print(f"  {path}:{line}  [{kind}]")
+    elif args.tables:
+        for table, files, usages in table_summary(conn):
+            print(f"  {table:<40} {files:>4} files  {usages:>5} usages")
+
+    conn.close()
+
+def extract_query_filters(content):
+    """Return (table, column, usage, line) for each column a query filters or sorts on.
+
+    usage is 'filter' or 'order'. Embedded-resource columns (rel.col) are skipped.
+    """
+    newlines = [i for i, ch in enumerate(content) if ch == '\n']
+    filters = []
+    for table, pos, chain in iter_query_chains(content):
+        line = line_of(newlines, pos)
+        for match in FILTER_CALL.finditer(chain):
+            usage = 'order' if match.group(1) == 'order' else 'filter'
+            filters.append((table, match.group(2), usage, line))
+        for match in MATCH_CALL.finditer(chain):
+            for column in MATCH_KEY.findall(match.group(1)):
+                filters.append((table, column, 'filter', line))
+        for match in OR_CALL.finditer(chain):
+            for column in OR_CONDITION.findall(match.group(1)):
+                filters.append((table, column, 'filter', line))
+    return filters
+
+def split_columns(column_list):
+    """Names of the plain columns in an index/constraint column list (None for expressions)."""
+    columns, depth, current = [], 0, ''
+    for ch in column_list + ',':
+        if ch == ',' and depth == 0:
+            part = current.strip()
+            ident = re.match(r'^"?([a-zA-Z0-9_]+)"?(?:\s+[a-zA-Z0-9_]+)*$', part)
+            columns.append(ident.group(1).lower() if ident else None)
+            current = ''
+            continue
+        depth += ch == '('
+        depth -= ch == ')'
+        current += ch
+    return columns
+
+def read_parenthesized(sql, start):
+    """Return the text between the '(' just before `start` and its matching ')'."""
+    depth = 1
+    for pos in range(start, len(sql)):
+        if sql[pos] == '(':
+            depth += 1
+        elif sql[pos] == ')':
+            depth -= 1
+            if depth == 0:
+                return sql[start:pos]
+    return sql[start:]
+
+def split_table_body(body):
+    parts, depth, current = [], 0, ''
+    for ch in body:
+        if ch == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += ch == '('
+        depth -= ch == ')'
+        current += ch
+    parts.append(current)
+    return parts
+
+def build_index_catalog(schema_files=SCHEMA_FILES, migrations_dir=MIGRATIONS_DIR):
+    """Replay CREATE TABLE / CREATE INDEX / constraint DDL into {table: {index_name: [columns]}}."""
+    paths = [p for p in schema_files if os.path.isfile(p)]
+    if os.path.isdir(migrations_dir):
+        paths += [os.path.join(migrations_dir, f) for f in sorted(os.listdir(migrations_dir)) if f.endswith('.sql')]
+
+    catalog = {}
+    index_tables = {}
+
+    def add_index(table, name, columns):
+        catalog.setdefault(table, {})[name] = columns
+        index_tables[name] = table
+
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            sql = SQL_COMMENT.sub(' ', f.read())
+
+        for match in DDL_STATEMENT.finditer(sql):
+            kind = match.lastgroup
+            statement = match.group(kind)
+            if kind == 'create_table':
+                table = CREATE_TABLE.match(statement).group(1).lower()
+                catalog.setdefault(table, {})
+                for part in split_table_body(read_parenthesized(sql, match.end())):
+                    key = TABLE_KEY.match(part)
+                    if key:
+                        suffix = 'pkey' if key.group(2).upper().startswith('PRIMARY') else 'key'
+                        add_index(table, key.group(1) or f"{table}_{suffix}", split_columns(key.group(3)))
+                        continue
+                    key = COLUMN_KEY.match(part)
+                    if key and not re.match(r'^\s*(CONSTRAINT|CHECK|FOREIGN|EXCLUDE)\b', part, re.IGNORECASE):
+                        column = key.group(1).lower()
+                        suffix = 'pkey' if key.group(2).upper().startswith('PRIMARY') else f"{column}_key"
+                        add_index(table, f"{table}_{suffix}", [column])
+            elif kind == 'create_index':
+                parsed = CREATE_INDEX.match(statement)
+                table = parsed.group(2).lower()
+                columns = split_columns(read_parenthesized(sql, match.end()))
+                add_index(table, (parsed.group(1) or f"{table}_{columns[0]}_idx").lower(), columns)
+            elif kind == 'add_constraint':
+                parsed = ADD_CONSTRAINT.match(statement)
+                table = parsed.group(1).lower()
+                add_index(table, (parsed.group(2) or f"{table}_key").lower(), split_columns(parsed.group(3)))
+            elif kind == 'add_column_key':
+                parsed = ADD_COLUMN_KEY.match(statement)
+                table, column = parsed.group(1).lower(), parsed.group(2).lower()
+                add_index(table, f"{table}_{column}_key", [column])
+            elif kind == 'drop_index':
+                for name in DROP_INDEX.match(statement).group(1).split(','):
+                    name = name.strip().split()[0].split('.')[-1].strip('"').lower() if name.strip() else ''
+                    table = index_tables.pop(name, None)
+                    if table:
+                        catalog[table].pop(name, None)
+            elif kind == 'drop_table':
+                table = DROP_TABLE.match(statement).group(1).lower()
+                for name in catalog.pop(table, {}):
+                    index_tables.pop(name, None)
+
+    return catalog
+
+def is_column_indexed(catalog, table, column):
+    # A b-tree can only serve a filter or sort on its leading column
+    return any(columns and columns[0] == column.lower() for columns in catalog.get(table, {}).values())
+
+def advise_indexes(roots=INDEX_ROOTS):
+    """Rank filtered/sorted columns that no index leads with, most used first."""
+    usage = {}
+    with profiling.span("walk"):
+        paths = [p for p in iter_index_files(roots) if os.path.splitext(p)[1] != '.sql']
+    for path in paths:
+        with profiling.span("read"):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        with profiling.span("match"):
+            filters = extract_query_filters(content)
+        for table, column, kind, line in filters:
+            entry = usage.setdefault((table, column), {'filter': 0, 'order': 0, 'locations': []})
+            entry[kind] += 1
+            entry['locations'].append(f"{path}:{line}")
+
+    catalog = build_index_catalog()
+    missing = []
+    unknown_tables = set()
+    for (table, column), entry in usage.items():
+        if table not in catalog:
+            unknown_tables.add(table)
+        elif not is_column_indexed(catalog, table, column):
+            missing.append((table, column, entry))
+
+    missing.sort(key=lambda m: (-(m[2]['filter'] + m[2]['order']), m[0], m[1]))
+    return missing, unknown_tables, catalog
+
+def print_index_advice(top):
+    missing, unknown_tables, catalog = advise_indexes()
+
+    print("\n" + "="*40)
+    print("🐢 MISSING INDEX REPORT")
+    print("="*40)
+    print(f"📚 Catalog: {len(catalog)} tables, {sum(len(i) for i in catalog.values())} indexes from schema + migrations")
+
+    print(f"\n⚠️  FILTERED/SORTED COLUMNS WITH NO INDEX ({len(missing)}):")
+    for table, column, entry in missing[:top]:
+        uses = entry['filter'] + entry['order']
+        print(f"  🔴 {table}.{column}  ({uses} uses: {entry['filter']} filter, {entry['order']} order)")
+        for location in entry['locations'][:3]:
+            print(f"      {location}")
+        if len(entry['locations']) > 3:
+            print(f"      ... {len(entry['locations']) - 3} more")
+    if len(missing) > top:
+        print(f"  ... {len(missing) - top} more (raise --top to see them)")
+
+    if unknown_tables:
+        print(f"\n❔ Queried tables with no CREATE TABLE in schema/migrations ({len(unknown_tables)}):")
+        print("   " + ", ".join(sorted(unknown_tables)))
+
+    print("\n" + "="*40)
+    print("ACTION PLAN:")
+    print("1. Start at the top: those columns are filtered most often.")
+    print("2. Add a migration with CREATE INDEX IF NOT EXISTS for the column (or a composite index led by it).")
 
 def main():
-    real_tables = find_table_usages(ROOT_DIR)
+    parser = argparse.ArgumentParser(description="Report which Supabase tables the codebase touches.")
+    parser.add_argument("--index", action="store_true", help="build or refresh the table usage index")
+    parser.add_argument("--lookup", metavar="TABLE", help="list every file/line that touches TABLE")
+    parser.add_argument("--kind", help="restrict --lookup to one access kind (select, insert, update, upsert, delete, from, rpc, sql)")
+    parser.add_argument("--tables", action="store_true", help="list indexed tables with usage counts")
+    parser.add_argument("--no-refresh", action="store_true", help="query the index without rescanning changed files")
+    parser.add_argument("--db", default=INDEX_DB, help=f"index location (default: {INDEX_DB})")
+    parser.add_argument("--advise-indexes", action="store_true", help="rank filtered/sorted columns that no index in the migrations covers")
+    parser.add_argument("--top", type=int, default=30, help="how many --advise-indexes findings to print (default: 30)")
+    parser.add_argument("--since", metavar="REF", help="only rescan files changed since the git ref REF, reusing cached results for the rest (git-ignored files are skipped)")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.profiled("scan_db_usage", args.profile):
+        run(args)
+
+def run(args):
+    if args.index or args.lookup or args.tables:
+        run_index_cli(args)
+        return
+
+    if args.advise_indexes:
+        print_index_advice(args.top)
+        return
+
+    if args.since:
+        real_tables = find_table_usages_since(args.since)
+    else:
+        real_tables = find_table_usages(ROOT_DIR)
     
     print("\n" + "="*40)
     print("📊 CODEBASE USAGE REPORT")
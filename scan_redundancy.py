@@ -1,7 +1,18 @@
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
 import os
 import re
+import select
+import struct
+import sys
+import time
 from collections import defaultdict
 
+import git_scope
+import profiling
+
 ROOT_DIR = "."
 EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx'}
 OUTPUT_FILE = "redundancy_report.txt"
@@ -15,41 +26,231 @@ PATTERNS = {
     "Currency Formatter": r"Intl\.NumberFormat",
 }
 
-def scan_codebase():
-    tool_locations = defaultdict(list)
-    file_names = defaultdict(list)
-    output_lines = []
+# Common Next.js/React file names that are supposed to be duplicated
+EXPECTED_DUPLICATE_NAMES = ['page.tsx', 'layout.tsx', 'loading.tsx', 'error.tsx', 'index.ts', 'route.ts']
+
+# Near-duplicate detection (MinHash over token shingles + LSH banding)
+TOKEN_PATTERN = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*|\d+|\S")
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 30
+MINHASH_BINS = 64
+# 12 bands of 5 rows (60 of the 64 bins): a pair at NEAR_DUPLICATE_THRESHOLD
+# becomes a candidate with probability 1 - (1 - 0.8^5)^12 ~= 0.99, a pair at
+# 0.5 only ~0.32 of the time
+LSH_BANDS = 12
+LSH_ROWS = 5
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Buckets up to this size compare every pair; bigger ones (large copy-paste
+# families or shared boilerplate) compare each member against the bucket's
+# first file only, which keeps them linear
+MAX_PAIRWISE_BUCKET = 100
+
+# Watch mode: wait this long after the last change before rewriting the report
+DEBOUNCE_SECONDS = 0.5
+POLL_INTERVAL_SECONDS = 1.0
+
+def is_skipped_dir(path):
+    return 'node_modules' in path or '.git' in path
+
+def is_backup_file(path):
+    # Editor/codemod leftovers such as ContentCalendar.tsx.bak
+    stem, ext = os.path.splitext(path)
+    return ext == '.bak' and os.path.splitext(stem)[1] in EXTENSIONS
+
+def is_scanned_file(path):
+    _, ext = os.path.splitext(path)
+    return ext in EXTENSIONS or is_backup_file(path)
+
+def is_scanned_path(path):
+    return is_scanned_file(path) and not is_skipped_dir(os.path.dirname(path))
+
+def shingle_hashes(content):
+    """64-bit hashes of every SHINGLE_SIZE-token window in the file."""
+    tokens = TOKEN_PATTERN.findall(content)
+    hashes = set()
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        shingle = ' '.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8')
+        hashes.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), 'big'))
+    return hashes
+
+def minhash_signature(content):
+    """One-permutation MinHash: the minimum hash that lands in each of MINHASH_BINS bins.
+
+    Costs a single pass over the shingles instead of one per hash function.
+    Returns None for files too small to compare meaningfully.
+    """
+    hashes = shingle_hashes(content)
+    if len(hashes) < MIN_SHINGLES:
+        return None
+
+    bin_bits = MINHASH_BINS.bit_length() - 1
+    value_mask = (1 << (64 - bin_bits)) - 1
+    signature = [None] * MINHASH_BINS
+    for h in hashes:
+        b = h >> (64 - bin_bits)
+        v = h & value_mask
+        if signature[b] is None or v < signature[b]:
+            signature[b] = v
+
+    # Densify: an empty bin copies a non-empty bin chosen by a fixed
+    # per-bin probe sequence, so similar files fill their gaps the same way
+    filled = list(signature)
+    for b in range(MINHASH_BINS):
+        attempt = 0
+        while filled[b] is None:
+            probe = hashlib.blake2b(f"{b}:{attempt}".encode(), digest_size=2).digest()
+            filled[b] = signature[int.from_bytes(probe, 'big') % MINHASH_BINS]
+            attempt += 1
+    return filled
+
+def signature_similarity(a, b):
+    return sum(1 for x, y in zip(a, b) if x == y) / MINHASH_BINS
+
+def analyze_content(path, content):
+    """Return the per-file record: core tools defined, content hash and MinHash signature.
+
+    The record depends only on the content (the --since cache is keyed by
+    git blob), so backup files are filtered out when records are indexed.
+    """
+    return {
+        'tools': [tool for tool, pattern in PATTERNS.items() if re.search(pattern, content)],
+        'sha256': hashlib.sha256(content.encode('utf-8')).hexdigest() if content.strip() else None,
+        'minhash': minhash_signature(content),
+    }
+
+def analyze_file(path):
+    try:
+        with profiling.span("read"):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        with profiling.span("match"):
+            return analyze_content(path, content)
+    except:
+        return {'tools': [], 'sha256': None, 'minhash': None}
+
+class RedundancyIndex:
+    """Per-file analysis results plus the aggregates the report is built from.
+
+    Keeping the per-file records around lets watch mode move a single file in
+    or out of `tool_locations` / `file_names` / `content_hashes` without
+    rescanning the tree.
+    """
+
+    def __init__(self):
+        self.tool_locations = defaultdict(list)
+        self.file_names = defaultdict(list)
+        self.content_hashes = defaultdict(list)
+        self.files = {}
 
-    print(f"🕵️  Hunting for Duplicates in {os.path.abspath(ROOT_DIR)}...")
+    def add(self, path, record=None):
+        self.remove(path)
+        if record is None:
+            record = analyze_file(path)
+        self.files[path] = record
+        if record['sha256']:
+            self.content_hashes[record['sha256']].append(path)
+        if not is_backup_file(path):
+            self.file_names[os.path.basename(path)].append(path)
+            for tool in record['tools']:
+                self.tool_locations[tool].append(path)
 
-    for root, dirs, files in os.walk(ROOT_DIR):
-        if 'node_modules' in root or '.git' in root:
+    def remove(self, path):
+        record = self.files.pop(path, None)
+        if record is None:
+            return
+        if record['sha256']:
+            self.content_hashes[record['sha256']].remove(path)
+            if not self.content_hashes[record['sha256']]:
+                del self.content_hashes[record['sha256']]
+        if not is_backup_file(path):
+            name = os.path.basename(path)
+            self.file_names[name].remove(path)
+            if not self.file_names[name]:
+                del self.file_names[name]
+            for tool in record['tools']:
+                self.tool_locations[tool].remove(path)
+
+    def refresh(self, path):
+        if os.path.isfile(path) and is_scanned_file(path):
+            self.add(path)
+        else:
+            self.remove(path)
+
+    def near_duplicate_clusters(self):
+        """Group files whose estimated Jaccard similarity is >= NEAR_DUPLICATE_THRESHOLD.
+
+        LSH banding only compares files that share at least one band, so the
+        work grows with the number of similar files rather than all pairs.
+        Buckets larger than MAX_PAIRWISE_BUCKET are matched against their
+        first file, and pairs already in the same cluster are not compared
+        again. Exact copies are represented by a single file (they are
+        reported separately). Returns [(paths, {path: best score})], largest first.
+        """
+        representatives = {}
+        for path in sorted(self.files):
+            record = self.files[path]
+            if record['minhash'] is not None:
+                representatives.setdefault(record['sha256'], path)
+        signatures = {p: self.files[p]['minhash'] for p in representatives.values()}
+
+        buckets = defaultdict(list)
+        for path, signature in signatures.items():
+            for band in range(LSH_BANDS):
+                rows = tuple(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+                buckets[(band, rows)].append(path)
+
+        parent = {}
+        def find(p):
+            root = p
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while p != root:
+                parent[p], p = root, parent[p]
+            return root
+
+        best = defaultdict(float)
+        def link(a, b):
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                return
+            score = signature_similarity(signatures[a], signatures[b])
+            if score >= NEAR_DUPLICATE_THRESHOLD:
+                best[a] = max(best[a], score)
+                best[b] = max(best[b], score)
+                parent[root_a] = root_b
+
+        for paths in buckets.values():
+            if len(paths) > MAX_PAIRWISE_BUCKET:
+                for b in paths[1:]:
+                    link(paths[0], b)
+                continue
+            for i, a in enumerate(paths):
+                for b in paths[i + 1:]:
+                    link(a, b)
+
+        clusters = defaultdict(list)
+        for path in best:
+            clusters[find(path)].append(path)
+        result = [(sorted(paths), {p: best[p] for p in paths}) for paths in clusters.values()]
+        return sorted(result, key=lambda c: (-len(c[0]), c[0]))
+
+def walk_files(root_dir):
+    for root, dirs, files in os.walk(root_dir):
+        if is_skipped_dir(root):
             continue
-            
+
         for file in files:
-            _, ext = os.path.splitext(file)
-            if ext in EXTENSIONS:
-                path = os.path.join(root, file)
-                
-                # Check for Duplicate File Names
-                file_names[file].append(path)
-
-                # Check for Duplicate Tool Definitions
-                try:
-                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        for tool, pattern in PATTERNS.items():
-                            if re.search(pattern, content):
-                                tool_locations[tool].append(path)
-                except:
-                    pass
+            if is_scanned_file(file):
+                yield os.path.join(root, file)
+
+def build_report(index):
+    output_lines = []
 
-    # --- GENERATE REPORT ---
     output_lines.append("="*50)
     output_lines.append("🚩 DUPLICATE TOOL DEFINITIONS (Merge These!)")
     output_lines.append("="*50)
-    
-    for tool, paths in tool_locations.items():
+
+    for tool, paths in index.tool_locations.items():
         if len(paths) > 1:
             output_lines.append(f"\n⚠️  {tool} defined in {len(paths)} places:")
             for p in sorted(paths): # Sort for readability
@@ -58,24 +259,231 @@ def scan_codebase():
     output_lines.append("\n" + "="*50)
     output_lines.append("🚩 DUPLICATE FILE NAMES (Confusing Imports)")
     output_lines.append("="*50)
-    
-    for name, paths in file_names.items():
-        # Filter out common Next.js/React file names that are supposed to be duplicated
-        if len(paths) > 1 and name not in ['page.tsx', 'layout.tsx', 'loading.tsx', 'error.tsx', 'index.ts', 'route.ts']:
+
+    for name, paths in index.file_names.items():
+        if len(paths) > 1 and name not in EXPECTED_DUPLICATE_NAMES:
             output_lines.append(f"\n⚠️  {name} exists in {len(paths)} places:")
             for p in sorted(paths):
                 output_lines.append(f"   - {p}")
 
-    # --- SAVE TO FILE ---
+    output_lines.append("\n" + "="*50)
+    output_lines.append("🚩 IDENTICAL FILE CONTENTS (Delete the Copies!)")
+    output_lines.append("="*50)
+
+    for digest, paths in sorted(index.content_hashes.items(), key=lambda item: sorted(item[1])):
+        if len(paths) > 1:
+            output_lines.append(f"\n⚠️  {len(paths)} identical files (sha256 {digest[:12]}):")
+            for p in sorted(paths):
+                output_lines.append(f"   - {p}")
+
+    output_lines.append("\n" + "="*50)
+    output_lines.append("🚩 NEAR-DUPLICATE FILES (Copy-Pasted Code)")
+    output_lines.append("="*50)
+
+    for paths, scores in index.near_duplicate_clusters():
+        output_lines.append(f"\n⚠️  {len(paths)} similar files (similarity {min(scores.values()):.2f}-{max(scores.values()):.2f}):")
+        for p in paths:
+            output_lines.append(f"   - {p} ({scores[p]:.2f})")
+
+    output_lines.append("\n" + "="*50)
+    output_lines.append("🚩 BACKUP FILES (Delete Once Verified)")
+    output_lines.append("="*50 + "\n")
+
+    for p in sorted(p for p in index.files if is_backup_file(p)):
+        output_lines.append(f"   - {p}")
+
+    return output_lines
+
+def write_report(output_lines):
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         f.write("\n".join(output_lines))
 
+def scan_codebase(since=None):
+    index = RedundancyIndex()
+    if since:
+        print(f"🕵️  Hunting for Duplicates changed since {since} in {os.path.abspath(ROOT_DIR)}...")
+        results, changed = git_scope.scan_since("scan_redundancy_v3", since, is_scanned_path, analyze_content)
+        print(f"   {len(changed)} changed files rescanned, {len(results)} files in total")
+        for path, record in results.items():
+            index.add(os.path.join(ROOT_DIR, path), record)
+    else:
+        print(f"🕵️  Hunting for Duplicates in {os.path.abspath(ROOT_DIR)}...")
+        with profiling.span("walk"):
+            paths = list(walk_files(ROOT_DIR))
+        for path in paths:
+            index.add(path)
+
+    # --- GENERATE REPORT ---
+    with profiling.span("report"):
+        output_lines = build_report(index)
+
+    # --- SAVE TO FILE ---
+    write_report(output_lines)
+
     # --- PRINT TO SCREEN ---
     print("\n".join(output_lines))
     print("\n" + "="*50)
     print(f"💾 Report saved to: {OUTPUT_FILE}")
     print("="*50)
 
-if __name__ == "__main__":
-    scan_codebase()
+    return index
+
+# --- WATCH MODE ---
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyWatcher:
+    """Recursive directory watcher on top of the Linux inotify syscalls."""
 
+    def __init__(self, root_dir):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}
+        for root, dirs, files in os.walk(root_dir):
+            dirs[:] = [d for d in dirs if not is_skipped_dir(d)]
+            self.add_dir(root)
+
+    def add_dir(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = path
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds and return the set of changed paths."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            offset += length
+
+            parent = self.dirs.get(wd)
+            if parent is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.dirs[wd]
+                continue
+
+            path = os.path.join(parent, name) if name else parent
+            if mask & IN_ISDIR:
+                if is_skipped_dir(path):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Watch the new directory and pick up anything already inside it
+                    for root, dirs, files in os.walk(path):
+                        dirs[:] = [d for d in dirs if not is_skipped_dir(d)]
+                        self.add_dir(root)
+                        changed.update(os.path.join(root, f) for f in files)
+                else:
+                    changed.add(path)
+            elif is_scanned_file(name):
+                # Ignore everything else, including our own report writes
+                changed.add(path)
+
+        return changed
+
+class PollingWatcher:
+    """Fallback for platforms without inotify: compares mtimes on each poll."""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for path in walk_files(self.root_dir):
+            try:
+                snapshot[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(POLL_INTERVAL_SECONDS if timeout is None else max(timeout, POLL_INTERVAL_SECONDS))
+        current = self.take_snapshot()
+        changed = {p for p in current.keys() | self.snapshot.keys() if current.get(p) != self.snapshot.get(p)}
+        self.snapshot = current
+        return changed
+
+def make_watcher(root_dir):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root_dir)
+        except (OSError, AttributeError):
+            pass
+    print("⚠️  inotify unavailable, falling back to polling")
+    return PollingWatcher(root_dir)
+
+def watch_codebase(debounce=DEBOUNCE_SECONDS, since=None):
+    index = scan_codebase(since)
+    watcher = make_watcher(ROOT_DIR)
+    print(f"\n👀 Watching {os.path.abspath(ROOT_DIR)} for changes (Ctrl+C to stop)...")
+
+    pending = set()
+    try:
+        while True:
+            # Block until something changes, then keep collecting until things go quiet
+            changed = watcher.wait(debounce if pending else None)
+            if changed:
+                pending.update(p for p in changed if not is_skipped_dir(p))
+                continue
+            if not pending:
+                continue
+
+            for path in pending:
+                if os.path.isdir(path):
+                    continue
+                if is_scanned_file(path) or path in index.files:
+                    index.refresh(path)
+                else:
+                    # A removed directory: drop everything that lived under it
+                    prefix = path.rstrip(os.sep) + os.sep
+                    for known in [k for k in index.files if k.startswith(prefix)]:
+                        index.remove(known)
+
+            write_report(build_report(index))
+            print(f"🔄 {time.strftime('%H:%M:%S')} re-analyzed {len(pending)} changed paths, report updated")
+            pending.clear()
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicated tool definitions and file names.")
+    parser.add_argument("--watch", action="store_true", help="keep running and update the report as files change")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, help="seconds of quiet before the report is rewritten in watch mode")
+    parser.add_argument("--since", metavar="REF", help="only rescan files changed since the git ref REF, reusing cached results for the rest (git-ignored files are skipped)")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.profiled("scan_redundancy", args.profile):
+        if args.watch:
+            watch_codebase(args.debounce, args.since)
+        else:
+            scan_codebase(args.since)
+
+if __name__ == "__main__":
+    main()
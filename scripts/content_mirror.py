@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Local Content Mirror
+====================
+Read-through SQLite copy of the synced content_* tables. The Notion sync
+writes every batch it upserts to Supabase into the mirror in one local
+transaction, so support tools and scripts can read content in microseconds
+and keep working while Supabase or the network is down.
+
+Each mirrored table keeps the full row as JSON plus real, indexed columns
+for the fields we filter on (slug, featured, category, suburb).
+
+Usage:
+    from content_mirror import ContentMirror
+    mirror = ContentMirror()
+    mirror.get('content_services', slug='roof-restoration')
+    mirror.find('content_case_studies', featured=True, suburb='Berwick', limit=6)
+
+Author: Call Kaids Roofing System
+Version: 1.0.0
+"""
+
+import json
+import os
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIRROR_PATH = os.path.join(REPO_ROOT, '.content_mirror.sqlite')
+
+INDEXED_COLUMNS = ['slug', 'featured', 'category', 'suburb']
+IDENTIFIER = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+def _identifier(name: str) -> str:
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name}")
+    return name
+
+
+def _column_value(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class ContentMirror:
+    """SQLite mirror of the content tables with a small query API."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('CONTENT_MIRROR_PATH') or DEFAULT_MIRROR_PATH
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self._tables = {row['name'] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def close(self):
+        self.conn.close()
+
+    def _ensure_table(self, table: str, key: str):
+        if table in self._tables:
+            return
+        columns = ''.join(f", {c}" for c in INDEXED_COLUMNS if c != key)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({key} TEXT PRIMARY KEY{columns}, data TEXT NOT NULL)")
+        for column in INDEXED_COLUMNS:
+            if column != key:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})")
+        self._tables.add(table)
+
+    def upsert(self, table: str, rows: List[Dict], key: str = 'notion_id'):
+        """Write one batch of rows in a single transaction."""
+        table, key = _identifier(table), _identifier(key)
+        columns = [key] + [c for c in INDEXED_COLUMNS if c != key]
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f"{c} = excluded.{c}" for c in columns[1:])
+        with self.conn:
+            self._ensure_table(table, key)
+            self.conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}, data) VALUES ({placeholders}, ?) "
+                f"ON CONFLICT({key}) DO UPDATE SET {updates}, data = excluded.data",
+                [[_column_value(row.get(c)) for c in columns] + [json.dumps(row)] for row in rows]
+            )
+
+    def find(self, table: str, order_by: Optional[str] = None, descending: bool = False,
+             limit: Optional[int] = None, **filters) -> List[Dict]:
+        """Rows matching all `filters` (indexed columns or any JSON field), as dicts."""
+        table = _identifier(table)
+        if table not in self._tables:
+            return []
+
+        def column_expr(name: str) -> str:
+            name = _identifier(name)
+            return name if name in INDEXED_COLUMNS else f"json_extract(data, '$.{name}')"
+
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                clauses.append(f"{column_expr(name)} IS NULL")
+            else:
+                clauses.append(f"{column_expr(name)} = ?")
+                params.append(_column_value(value))
+
+        query = f"SELECT data FROM {table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            query += f" ORDER BY {column_expr(order_by)}{' DESC' if descending else ''}"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row['data']) for row in self.conn.execute(query, params)]
+
+    def get(self, table: str, **filters) -> Optional[Dict]:
+        """First row matching `filters`, e.g. get('content_services', slug='roof-restoration')."""
+        rows = self.find(table, limit=1, **filters)
+        return rows[0] if rows else None
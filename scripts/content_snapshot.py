@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Content Snapshot Export
+=======================
+Writes each synced content_* table to a static JSON bundle, precompressed
+with gzip (and brotli when the `brotli` package is installed), plus a
+manifest with a content-hash ETag per table. Bundles are only rewritten
+when their ETag changes, so the CDN cache survives syncs that changed
+nothing.
+
+The sync reads with the service-role key, which bypasses RLS, so each
+export applies the public read policy itself: blog posts are only included
+once their publish date has passed. The manifest records when the next
+scheduled post goes live, since the bundle only picks it up on the first
+export after that time.
+
+Author: Call Kaids Roofing System
+Version: 1.0.0
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip bundles are written without it
+    brotli = None
+
+CONTENT_TABLES = [
+    'content_blog_posts',
+    'content_services',
+    'content_suburbs',
+    'content_case_studies',
+    'content_testimonials',
+    'content_knowledge_base',
+]
+# Touched on every sync even when the content is the same; kept out of the
+# bundles so they do not change the ETag
+VOLATILE_COLUMNS = {'last_synced_at', 'updated_at'}
+# Tables whose public RLS policy is `USING (<column> <= now())`; rows with a
+# NULL or future date are hidden from anonymous readers
+PUBLISH_DATE_COLUMNS = {
+    'content_blog_posts': 'publish_date',
+}
+PAGE_SIZE = 1000
+MANIFEST_FILE = 'manifest.json'
+
+
+def fetch_table(client, table_name: str, as_of: str) -> List[Dict]:
+    """Publicly visible rows of a table at `as_of`, in a stable order, paging through PostgREST's row limit."""
+    publish_column = PUBLISH_DATE_COLUMNS.get(table_name)
+    rows = []
+    start = 0
+    while True:
+        query = client.table(table_name).select('*')
+        if publish_column:
+            # NULL <= as_of is not true, so unscheduled rows stay out as well
+            query = query.lte(publish_column, as_of)
+        page = query.order('id') \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute().data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def next_publish_at(client, table_name: str, as_of: str) -> Optional[str]:
+    """Earliest publish date after `as_of`, or None when nothing is scheduled."""
+    publish_column = PUBLISH_DATE_COLUMNS.get(table_name)
+    if not publish_column:
+        return None
+    rows = client.table(table_name).select(publish_column) \
+        .gt(publish_column, as_of) \
+        .order(publish_column) \
+        .limit(1) \
+        .execute().data or []
+    return rows[0][publish_column] if rows else None
+
+
+def canonical_json(rows: List[Dict]) -> bytes:
+    cleaned = [{k: v for k, v in row.items() if k not in VOLATILE_COLUMNS} for row in rows]
+    return json.dumps(cleaned, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load_manifest(out_dir: str) -> Dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_bundle(out_dir: str, table_name: str, body: bytes) -> Dict[str, str]:
+    """Write the plain and precompressed variants; returns {encoding: file name}."""
+    files = {'identity': f"{table_name}.json", 'gzip': f"{table_name}.json.gz"}
+    _write_atomic(os.path.join(out_dir, files['identity']), body)
+    # mtime=0 keeps the gzip bytes identical for identical content
+    _write_atomic(os.path.join(out_dir, files['gzip']), gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        files['br'] = f"{table_name}.json.br"
+        _write_atomic(os.path.join(out_dir, files['br']), brotli.compress(body, quality=11))
+    return files
+
+
+def export_content_snapshots(client, out_dir: str, tables: List[str] = CONTENT_TABLES) -> Dict:
+    """Export `tables` to `out_dir`.
+
+    Returns {'written': [...], 'unchanged': [...], 'next_publish_at': {table: timestamp}}.
+    Visibility is evaluated at the time of this call, so a post that went
+    live since the last export changes the body and the ETag.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    result = {'written': [], 'unchanged': [], 'next_publish_at': {}}
+    as_of = datetime.now(timezone.utc).isoformat()
+    manifest_changed = False
+
+    for table_name in tables:
+        rows = fetch_table(client, table_name, as_of)
+        body = canonical_json(rows)
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        scheduled = next_publish_at(client, table_name, as_of)
+        if scheduled:
+            result['next_publish_at'][table_name] = scheduled
+
+        previous = manifest.get(table_name, {})
+        have_files = all(os.path.isfile(os.path.join(out_dir, f)) for f in previous.get('files', {}).values())
+        wants_br = brotli is not None and 'br' not in previous.get('files', {})
+        if previous.get('etag') == etag and have_files and not wants_br:
+            result['unchanged'].append(table_name)
+            if previous.get('next_publish_at') != scheduled:
+                previous['next_publish_at'] = scheduled
+                manifest_changed = True
+            continue
+
+        manifest[table_name] = {
+            'etag': etag,
+            'rows': len(rows),
+            'bytes': len(body),
+            'files': write_bundle(out_dir, table_name, body),
+            'generated_at': datetime.utcnow().isoformat(),
+            'next_publish_at': scheduled,
+        }
+        result['written'].append(table_name)
+        manifest_changed = True
+
+    if manifest_changed:
+        _write_atomic(os.path.join(out_dir, MANIFEST_FILE), json.dumps(manifest, indent=2).encode('utf-8'))
+    return result
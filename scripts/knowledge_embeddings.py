@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Knowledge File Embeddings
+=========================
+Optional embedding stage for the knowledge files sync. Each file is chunked,
+chunks whose content hash is already stored are skipped, and only the new
+chunks are sent to the embedder in batches and written back in bulk.
+
+Embedders are pluggable: OpenAIEmbedder matches the model and vector size
+the edge functions use, HashingEmbedder is a deterministic local stand-in
+that needs no network access (for tests and dry runs).
+
+Author: Call Kaids Roofing System
+Version: 1.0.0
+"""
+
+import hashlib
+import json
+import math
+import os
+import urllib.request
+from typing import Dict, List, Optional
+
+from knowledge_index import chunk_text, tokenize
+
+EMBEDDINGS_TABLE = 'knowledge_file_embeddings'
+# Matches the vector(768) columns and dimensions used by the edge functions
+EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_DIMENSIONS = 768
+EMBED_BATCH_SIZE = 64
+WRITE_BATCH_SIZE = 100
+# PostgREST returns at most this many rows per request (the default max-rows)
+READ_PAGE_SIZE = 1000
+# Content hashes per delete request; each adds 65 characters to the URL
+PRUNE_BATCH_SIZE = 50
+
+
+class Embedder:
+    """Turns a batch of texts into vectors. Subclasses set `model` and implement embed()."""
+
+    model = ''
+    dimensions = EMBEDDING_DIMENSIONS
+    batch_size = EMBED_BATCH_SIZE
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API, one request per batch."""
+
+    def __init__(self, api_key: str, model: str = EMBEDDING_MODEL, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.api_key = api_key
+        self.model = model
+        self.dimensions = dimensions
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        request = urllib.request.Request(
+            'https://api.openai.com/v1/embeddings',
+            data=json.dumps({'model': self.model, 'input': texts, 'dimensions': self.dimensions}).encode('utf-8'),
+            headers={'Authorization': f"Bearer {self.api_key}", 'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=60) as response:
+            data = json.loads(response.read())['data']
+        return [item['embedding'] for item in sorted(data, key=lambda item: item['index'])]
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag-of-words feature hashing, L2-normalised. No network needed."""
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.model = f"local-hashing-{dimensions}"
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimensions
+            for token in tokenize(text):
+                digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dimensions
+                vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            vectors.append([v / norm for v in vector])
+        return vectors
+
+
+def get_embedder(name: Optional[str] = None) -> Optional[Embedder]:
+    """Embedder selected by KNOWLEDGE_EMBEDDER ('openai' or 'hashing'); None disables the stage."""
+    name = (name or os.getenv('KNOWLEDGE_EMBEDDER') or '').lower()
+    if not name:
+        return None
+    if name == 'openai':
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise ValueError("KNOWLEDGE_EMBEDDER=openai requires OPENAI_API_KEY")
+        return OpenAIEmbedder(api_key)
+    if name == 'hashing':
+        return HashingEmbedder()
+    raise ValueError(f"Unknown KNOWLEDGE_EMBEDDER: {name}")
+
+
+def content_hash(model: str, text: str) -> str:
+    # The model is part of the hash so switching embedders re-embeds everything
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+
+class KnowledgeEmbeddingStage:
+    """Embeds new or changed knowledge file chunks and prunes the ones that disappeared."""
+
+    def __init__(self, client, embedder: Embedder, table_name: str = EMBEDDINGS_TABLE):
+        self.client = client
+        self.embedder = embedder
+        self.table_name = table_name
+
+    def existing_hashes(self, file_keys: List[str]) -> Dict[str, Dict[str, int]]:
+        """Paged bulk read: {file_key: {content_hash: chunk_index}} for the given files."""
+        existing: Dict[str, Dict[str, int]] = {key: {} for key in file_keys}
+        for start in range(0, len(file_keys), WRITE_BATCH_SIZE):
+            offset = 0
+            while True:
+                rows = self.client.table(self.table_name) \
+                    .select('file_key, content_hash, chunk_index') \
+                    .in_('file_key', file_keys[start:start + WRITE_BATCH_SIZE]) \
+                    .order('id') \
+                    .range(offset, offset + READ_PAGE_SIZE - 1) \
+                    .execute().data or []
+                for row in rows:
+                    existing[row['file_key']][row['content_hash']] = row['chunk_index']
+                if len(rows) < READ_PAGE_SIZE:
+                    break
+                offset += READ_PAGE_SIZE
+        return existing
+
+    def run(self, documents: List[Dict]) -> Dict:
+        """Embed the active `documents` (knowledge_files rows) and return counts for the sync stats.
+
+        Inactive documents lose all their chunks, so their text does not outlive
+        the knowledge file's own visibility.
+        """
+        stats = {'chunks': 0, 'embedded': 0, 'skipped': 0, 'pruned_files': 0, 'removed_files': 0}
+        inactive = sorted({d['file_key'] for d in documents if d.get('file_key') and not d.get('active')})
+        documents = [d for d in documents if d.get('file_key') and d.get('active')]
+        inactive = [key for key in inactive if key not in {d['file_key'] for d in documents}]
+        self.remove_files(inactive, stats)
+        existing = self.existing_hashes([d['file_key'] for d in documents])
+
+        pending = []
+        moved = []
+        seen = set()
+        current: Dict[str, List[str]] = {}
+        for document in documents:
+            file_key = document['file_key']
+            hashes = current.setdefault(file_key, [])
+            for chunk_index, text in enumerate(chunk_text(document.get('content') or '')):
+                digest = content_hash(self.embedder.model, text)
+                hashes.append(digest)
+                stats['chunks'] += 1
+                # A repeated chunk (or a repeated file key) maps to the same row; one
+                # upsert batch may not touch a row twice, so keep the first occurrence
+                if (file_key, digest) in seen:
+                    stats['skipped'] += 1
+                    continue
+                seen.add((file_key, digest))
+                known_index = existing[file_key].get(digest)
+                if known_index is None:
+                    pending.append({
+                        'file_key': file_key,
+                        'chunk_index': chunk_index,
+                        'content_hash': digest,
+                        'content': text,
+                        'model': self.embedder.model,
+                    })
+                else:
+                    stats['skipped'] += 1
+                    if known_index != chunk_index:
+                        moved.append({'file_key': file_key, 'content_hash': digest, 'chunk_index': chunk_index})
+
+        try:
+            self.write_chunks(pending, moved, stats)
+        finally:
+            self.prune(current, existing, stats)
+        return stats
+
+    def write_chunks(self, pending: List[Dict], moved: List[Dict], stats: Dict):
+        """Embed and upsert the new chunks, then move known chunks to their new index."""
+        for start in range(0, len(pending), self.embedder.batch_size):
+            batch = pending[start:start + self.embedder.batch_size]
+            vectors = self.embedder.embed([row['content'] for row in batch])
+            rows = [{**row, 'embedding': vector} for row, vector in zip(batch, vectors)]
+            for write_start in range(0, len(rows), WRITE_BATCH_SIZE):
+                self.client.table(self.table_name).upsert(
+                    rows[write_start:write_start + WRITE_BATCH_SIZE],
+                    on_conflict='file_key,content_hash'
+                ).execute()
+            stats['embedded'] += len(batch)
+
+        # Partial rows can't go through upsert: the insert half would fail the NOT NULL columns
+        for row in moved:
+            self.client.table(self.table_name) \
+                .update({'chunk_index': row['chunk_index']}) \
+                .eq('file_key', row['file_key']) \
+                .eq('content_hash', row['content_hash']) \
+                .execute()
+
+    def remove_files(self, file_keys: List[str], stats: Dict):
+        """Delete every chunk of `file_keys` (deactivated knowledge files)."""
+        for start in range(0, len(file_keys), WRITE_BATCH_SIZE):
+            self.client.table(self.table_name).delete() \
+                .in_('file_key', file_keys[start:start + WRITE_BATCH_SIZE]) \
+                .execute()
+        stats['removed_files'] += len(file_keys)
+
+    def prune(self, current: Dict[str, List[str]], existing: Dict[str, Dict[str, int]], stats: Dict):
+        """Drop chunks that no longer exist in the file, naming the stale hashes in bounded batches."""
+        for file_key, hashes in current.items():
+            stale = sorted(set(existing[file_key]) - set(hashes))
+            if not stale:
+                continue
+            for start in range(0, len(stale), PRUNE_BATCH_SIZE):
+                self.client.table(self.table_name).delete() \
+                    .eq('file_key', file_key) \
+                    .in_('content_hash', stale[start:start + PRUNE_BATCH_SIZE]) \
+                    .execute()
+            stats['pruned_files'] += 1
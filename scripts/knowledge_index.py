@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Knowledge Search Index
+======================
+Builds a compact BM25 inverted index over the knowledge files synced from
+Notion plus the local documents listed in knowledge/index.json, so RAG
+retrieval can load one memory-mapped file and rank chunks without a
+database round trip.
+
+Index layout (little-endian):
+    header   MAGIC, format version, chunk count, term count, k1, b,
+             and the offsets of the sections below
+    terms    sorted fixed-size entries: string offset/length, df, idf,
+             postings offset (binary-searched straight from the mmap)
+    strings  UTF-8 term text
+    postings per term: (chunk id u32, term frequency u16) pairs
+    norms    per chunk: k1 * (1 - b + b * len / avg_len) as f32
+    chunks   JSON metadata for each chunk (doc key, title, text)
+
+Author: Call Kaids Roofing System
+Version: 1.0.0
+"""
+
+import hashlib
+import json
+import mmap
+import math
+import os
+import re
+import struct
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KNOWLEDGE_DIR = os.path.join(REPO_ROOT, 'knowledge')
+DEFAULT_INDEX_DIR = os.path.join(REPO_ROOT, '.knowledge_index')
+
+MAGIC = b'CKRBM25\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIIff5Q')
+TERM_ENTRY = struct.Struct('<IHIfQ')
+POSTING = struct.Struct('<IH')
+NORM = struct.Struct('<f')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Matches chunkText() in the embed-knowledge-base edge function
+CHUNK_MAX_CHARS = 1200
+CHUNK_OVERLAP = 150
+MIN_CHUNK_CHARS = 50
+# Published versions kept next to the current one
+KEEP_VERSIONS = 3
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with', 'we', 'you',
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_MAX_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split text into overlapping chunks, preferring sentence or paragraph breaks."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + max_chars
+        if end < len(text):
+            # lastIndexOf(c, end) includes position end, so search up to end + 1
+            break_point = max(text.rfind('.', 0, end + 1), text.rfind('\n', 0, end + 1))
+            if break_point > start + max_chars // 2:
+                end = break_point + 1
+        chunks.append(text[start:end].strip())
+        start = end - overlap
+    return [c for c in chunks if len(c) > MIN_CHUNK_CHARS]
+
+
+def document_hash(title: str, content: str) -> str:
+    return hashlib.sha256(f"{title}\0{content}".encode('utf-8')).hexdigest()
+
+
+def load_local_documents(knowledge_dir: str = KNOWLEDGE_DIR) -> List[Dict]:
+    """Documents listed in knowledge/index.json, as {key, title, category, content} dicts."""
+    with open(os.path.join(knowledge_dir, 'index.json'), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+
+    documents = []
+    for category, entries in index.get('files', {}).items():
+        for entry in entries:
+            if isinstance(entry, dict):
+                doc_id, rel_path = entry['id'], entry['path']
+            else:
+                doc_id, rel_path = entry, os.path.join(category, entry)
+            path = os.path.join(knowledge_dir, rel_path)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+            documents.append({
+                'key': f"local:{doc_id}",
+                'title': doc_id,
+                'category': category,
+                'content': content,
+            })
+    return documents
+
+
+def analyze_document(document: Dict) -> Dict:
+    """Chunk one document and count the terms in each chunk."""
+    chunks = []
+    for i, text in enumerate(chunk_text(document['content'])):
+        terms = tokenize(text)
+        chunks.append({
+            'chunk_index': i,
+            'text': text,
+            'length': len(terms),
+            'tf': dict(Counter(terms)),
+        })
+    return {'hash': document_hash(document['title'], document['content']), 'chunks': chunks}
+
+
+class KnowledgeIndexBuilder:
+    """Builds and publishes versioned index files, re-analyzing only changed documents."""
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        self.cache_path = os.path.join(index_dir, 'documents.json')
+        self.manifest_path = os.path.join(index_dir, 'manifest.json')
+
+    def _load_json(self, path: str) -> Dict:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_atomic(self, path: str, data: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def build(self, documents: List[Dict]) -> Dict:
+        """Build the index for `documents` and return the manifest.
+
+        If nothing changed since the last build, the current version is kept
+        and no file is written.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        cache = self._load_json(self.cache_path)
+        manifest = self._load_json(self.manifest_path)
+
+        analyzed = {}
+        reanalyzed = 0
+        for document in documents:
+            cached = cache.get(document['key'])
+            if cached and cached['hash'] == document_hash(document['title'], document['content']):
+                analyzed[document['key']] = cached
+            else:
+                analyzed[document['key']] = analyze_document(document)
+                reanalyzed += 1
+            analyzed[document['key']]['title'] = document['title']
+            analyzed[document['key']]['category'] = document.get('category')
+
+        removed = len(set(cache) - set(analyzed))
+        if manifest.get('current') and not reanalyzed and not removed \
+                and os.path.isfile(os.path.join(self.index_dir, manifest['current'])):
+            manifest['reanalyzed'] = 0
+            return manifest
+
+        data = serialize_index(analyzed)
+        version = hashlib.sha256(data).hexdigest()[:16]
+        file_name = f"bm25-{version}.idx"
+        self._write_atomic(os.path.join(self.index_dir, file_name), data)
+        self._write_atomic(self.cache_path, json.dumps(analyzed).encode('utf-8'))
+
+        history = [v for v in manifest.get('history', []) if v != file_name]
+        history = ([manifest['current']] if manifest.get('current') and manifest['current'] != file_name else []) + history
+        for stale in history[KEEP_VERSIONS:]:
+            try:
+                os.remove(os.path.join(self.index_dir, stale))
+            except OSError:
+                pass
+
+        manifest = {
+            'current': file_name,
+            'version': version,
+            'format_version': FORMAT_VERSION,
+            'built_at': datetime.utcnow().isoformat(),
+            'documents': len(analyzed),
+            'chunks': sum(len(d['chunks']) for d in analyzed.values()),
+            'reanalyzed': reanalyzed,
+            'removed': removed,
+            'history': history[:KEEP_VERSIONS],
+        }
+        self._write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode('utf-8'))
+        return manifest
+
+
+def serialize_index(analyzed: Dict[str, Dict]) -> bytes:
+    """Lay out the analyzed documents as the binary index format described above."""
+    chunk_meta = []
+    lengths = []
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for key in sorted(analyzed):
+        document = analyzed[key]
+        for chunk in document['chunks']:
+            chunk_id = len(chunk_meta)
+            chunk_meta.append({
+                'doc_key': key,
+                'title': document.get('title'),
+                'category': document.get('category'),
+                'chunk_index': chunk['chunk_index'],
+                'text': chunk['text'],
+            })
+            lengths.append(chunk['length'])
+            for term, tf in chunk['tf'].items():
+                postings.setdefault(term, []).append((chunk_id, min(tf, 0xFFFF)))
+
+    num_chunks = len(chunk_meta)
+    avg_len = (sum(lengths) / num_chunks) if num_chunks else 1.0
+    terms = sorted(postings)
+
+    strings = bytearray()
+    term_table = bytearray()
+    posting_data = bytearray()
+    for term in terms:
+        encoded = term.encode('utf-8')
+        df = len(postings[term])
+        idf = math.log(1 + (num_chunks - df + 0.5) / (df + 0.5))
+        term_table += TERM_ENTRY.pack(len(strings), len(encoded), df, idf, len(posting_data))
+        strings += encoded
+        for chunk_id, tf in postings[term]:
+            posting_data += POSTING.pack(chunk_id, tf)
+
+    norms = b''.join(NORM.pack(BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)) for length in lengths)
+    meta = json.dumps(chunk_meta).encode('utf-8')
+
+    terms_offset = HEADER.size
+    strings_offset = terms_offset + len(term_table)
+    postings_offset = strings_offset + len(strings)
+    norms_offset = postings_offset + len(posting_data)
+    meta_offset = norms_offset + len(norms)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, num_chunks, len(terms), BM25_K1, BM25_B,
+                         terms_offset, strings_offset, postings_offset, norms_offset, meta_offset)
+    return header + bytes(term_table) + bytes(strings) + bytes(posting_data) + norms + meta
+
+
+class KnowledgeIndex:
+    """Read-only, memory-mapped BM25 index. Load once, then call search()."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.num_chunks, self.num_terms, self.k1, self.b,
+         self.terms_offset, self.strings_offset, self.postings_offset,
+         self.norms_offset, meta_offset) = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a format {FORMAT_VERSION} knowledge index")
+        self.chunks = json.loads(self.buf[meta_offset:])
+        self.norms = [n for (n,) in NORM.iter_unpack(self.buf[self.norms_offset:meta_offset])]
+
+    @classmethod
+    def load_current(cls, index_dir: str = DEFAULT_INDEX_DIR) -> 'KnowledgeIndex':
+        with open(os.path.join(index_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return cls(os.path.join(index_dir, manifest['current']))
+
+    def _term_entry(self, i: int) -> Tuple[str, int, float, int]:
+        str_off, str_len, df, idf, post_off = TERM_ENTRY.unpack_from(self.buf, self.terms_offset + i * TERM_ENTRY.size)
+        start = self.strings_offset + str_off
+        return self.buf[start:start + str_len].decode('utf-8'), df, idf, post_off
+
+    def _lookup(self, term: str) -> Optional[Tuple[int, float, int]]:
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            text, df, idf, post_off = self._term_entry(mid)
+            if text == term:
+                return df, idf, post_off
+            if text < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[float, Dict]]:
+        """Return up to `limit` (score, chunk) pairs, best first."""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            entry = self._lookup(term)
+            if entry is None:
+                continue
+            df, idf, post_off = entry
+            start = self.postings_offset + post_off
+            for chunk_id, tf in POSTING.iter_unpack(self.buf[start:start + df * POSTING.size]):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.norms[chunk_id])
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(score, self.chunks[chunk_id]) for chunk_id, score in best]
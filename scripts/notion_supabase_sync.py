@@ -9,15 +9,27 @@ Author: Call Kaids Roofing System
 Version: 1.0.0
 """
 
+import argparse
+import json
 import os
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dotenv import load_dotenv
 from notion_client import Client as NotionClient
 from supabase import create_client, Client as SupabaseClient
 import logging
 
+# Shared --profile support lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import profiling
+
+from knowledge_index import DEFAULT_INDEX_DIR, KnowledgeIndexBuilder, load_local_documents
+from knowledge_embeddings import Embedder, KnowledgeEmbeddingStage, get_embedder
+import content_snapshot
+from content_mirror import ContentMirror
+from sync_pipeline import TablePipeline, query_pages
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +56,23 @@ for var in required_env_vars:
         logger.error(f"Missing required environment variable: {var}")
         sys.exit(1)
 
+# Rows per Supabase upsert request (and per local mirror transaction)
+UPSERT_BATCH_SIZE = 100
+
+# Notion relation properties stored as foreign keys. Notion only gives us page
+# IDs, so these columns are filled in after every table has been synced
+# (see resolve_relations); `many` columns hold a uuid[] of target row ids.
+RELATIONS = [
+    {'table': 'content_case_studies', 'property': 'Suburb Page', 'column': 'suburb_id',
+     'target': 'content_suburbs', 'many': False},
+    {'table': 'content_testimonials', 'property': 'Case Study', 'column': 'case_study_id',
+     'target': 'content_case_studies', 'many': False},
+    {'table': 'content_knowledge_base', 'property': 'Service Pages', 'column': 'related_service_ids',
+     'target': 'content_services', 'many': True},
+]
+# notion_id values per request when looking up relation targets
+RELATION_LOOKUP_BATCH_SIZE = 200
+
 # Initialize clients
 notion = NotionClient(auth=os.getenv('NOTION_API_KEY'))
 supabase: SupabaseClient = create_client(
@@ -55,7 +84,7 @@ supabase: SupabaseClient = create_client(
 class NotionSupabaseSync:
     """Handles syncing from Notion databases to Supabase tables."""
     
-    def __init__(self):
+    def __init__(self, embedder: Optional[Embedder] = None):
         self.sync_stats = {
             'started_at': datetime.utcnow().isoformat(),
             'tables_synced': 0,
@@ -65,24 +94,255 @@ class NotionSupabaseSync:
             'records_deleted': 0,
             'errors': []
         }
+        # Knowledge files upserted this run, fed into the search index build
+        self.knowledge_documents = []
+        self.knowledge_files_failed = False
+        # Optional embedding stage for knowledge files (KNOWLEDGE_EMBEDDER)
+        self.embedder = embedder if embedder is not None else get_embedder()
+        # Relation page IDs per table and notion_id, and the rows written for
+        # those tables ({notion_id: (row sent, row stored)}), kept until
+        # resolve_relations() runs; it turns collection off while it writes
+        self.relation_refs: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+        self.relation_rows: Dict[str, Dict[str, Tuple[Dict, Dict]]] = {}
+        self.collect_relation_rows = True
+        # Local read-through copy of the content tables
+        try:
+            self.mirror = ContentMirror()
+        except Exception as e:
+            logger.error(f"Content mirror unavailable, continuing without it: {str(e)}")
+            self.mirror = None
     
     def log_sync_result(self, table_name: str, status: str, stats: Dict):
         """Log sync results to content_sync_log table."""
+        with profiling.span('log', table=table_name):
+            try:
+                supabase.table('content_sync_log').insert({
+                    'table_name': table_name,
+                    'sync_type': 'notion_to_supabase',
+                    'sync_status': status,
+                    'started_at': self.sync_stats['started_at'],
+                    'completed_at': datetime.utcnow().isoformat(),
+                    'records_synced': stats.get('synced', 0),
+                    'records_created': stats.get('created', 0),
+                    'records_updated': stats.get('updated', 0),
+                    'records_deleted': stats.get('deleted', 0),
+                    'errors': stats.get('errors', [])
+                }).execute()
+            except Exception as e:
+                logger.error(f"Failed to log sync result for {table_name}: {str(e)}")
+    
+    def write_batch(self, table_name: str, batch: List[Dict], on_conflict: str, stats: Dict) -> List[Dict]:
+        """Upsert one batch to Supabase and mirror it locally. Raises if the upsert fails.
+        
+        Returns the rows as Supabase stored them (with id, created_at, ...).
+        """
+        with profiling.span('upsert', table=table_name, rows=len(batch)):
+            result = supabase.table(table_name).upsert(batch, on_conflict=on_conflict).execute()
+        stored = result.data or batch
+        stats['synced'] += len(batch)
+        stats['updated'] += len(result.data or [])
+        if self.collect_relation_rows and table_name in self.relation_refs:
+            # resolve_relations() re-upserts the rows as sent (the columns the sync
+            # owns) when the stored foreign keys differ from the resolved ones
+            stored_by_id = {row.get('notion_id'): row for row in stored}
+            rows = self.relation_rows.setdefault(table_name, {})
+            for row in batch:
+                rows[row['notion_id']] = (row, stored_by_id.get(row['notion_id'], row))
+        self.mirror_rows(table_name, stored, on_conflict)
+        return stored
+    
+    def write_rows(self, table_name: str, batch: List[Dict], on_conflict: str,
+                   stats: Dict) -> Tuple[List[Dict], List[Tuple[int, str]]]:
+        """Upsert a batch, falling back to one row at a time if the batch is rejected.
+        
+        One bad row (a CHECK violation, or two pages with the same key, which
+        Postgres refuses to upsert twice in one statement) fails the whole
+        batch. The fallback drops all but the last row for each conflict key
+        and retries the rest individually, so only the bad rows are lost.
+        Returns (stored rows, [(index in batch, error message)]).
+        """
+        try:
+            return self.write_batch(table_name, batch, on_conflict, stats), []
+        except Exception as e:
+            logger.warning(f"Upsert of {len(batch)} rows into {table_name} failed, retrying row by row: {str(e)}")
+        
+        columns = on_conflict.split(',')
+        keys = [tuple(row.get(column) for column in columns) for row in batch]
+        last_index = {key: index for index, key in enumerate(keys)}
+        written, errors = [], []
+        for index, row in enumerate(batch):
+            key = ', '.join(str(part) for part in keys[index])
+            if last_index[keys[index]] != index:
+                errors.append((index, f"Skipped {table_name} row with duplicate {on_conflict} {key}: a later page has the same key"))
+                continue
+            try:
+                written.extend(self.write_batch(table_name, [row], on_conflict, stats))
+            except Exception as e:
+                errors.append((index, f"Error upserting {table_name} row {key}: {str(e)}"))
+        return written, errors
+    
+    def upsert_rows(self, table_name: str, rows: List[Dict], on_conflict: str, stats: Dict) -> List[Dict]:
+        """Upsert rows to Supabase in batches, mirroring each written batch locally.
+        
+        Returns the rows that were written successfully.
+        """
+        written = []
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            stored, errors = self.write_rows(table_name, rows[start:start + UPSERT_BATCH_SIZE], on_conflict, stats)
+            written.extend(stored)
+            for _, error_msg in errors:
+                logger.error(error_msg)
+                stats['errors'].append(error_msg)
+        
+        return written
+    
+    def run_pipeline(self, table_name: str, db_id: str, label: str, extract, on_conflict: str, stats: Dict) -> List[Dict]:
+        """Fetch, extract and upsert one Notion database concurrently (see sync_pipeline).
+        
+        Returns the rows that were written; row and batch errors go to stats in page order.
+        """
+        pipeline = TablePipeline(
+            table_name, label, extract,
+            lambda batch: self.write_rows(table_name, batch, on_conflict, stats),
+            UPSERT_BATCH_SIZE
+        )
+        try:
+            return pipeline.run(query_pages(notion, db_id))
+        finally:
+            stats['errors'].extend(pipeline.ordered_errors())
+    
+    def mirror_rows(self, table_name: str, rows: List[Dict], key: str):
+        """Copy a batch that reached Supabase into the local SQLite mirror."""
+        if self.mirror is None or not table_name.startswith('content_'):
+            return
+        try:
+            self.mirror.upsert(table_name, rows, key)
+        except Exception as e:
+            logger.error(f"Failed to mirror {len(rows)} rows of {table_name}: {str(e)}")
+    
+    def collect_relations(self, table_name: str, properties: Dict, data: Dict):
+        """Remember the raw relation page IDs of one row for resolve_relations()."""
+        refs = self.relation_refs.setdefault(table_name, {})
+        for relation in RELATIONS:
+            # Databases without the property keep whatever the column holds today
+            if relation['table'] == table_name and relation['property'] in properties:
+                page_ids = self.get_notion_property(properties, relation['property'], 'relation') or []
+                refs.setdefault(data['notion_id'], {})[relation['column']] = page_ids
+    
+    def fetch_notion_id_map(self, table_name: str, notion_ids: Optional[List[str]] = None) -> Dict[str, str]:
+        """Map notion_id -> row id for a table: one paged bulk read, or a lookup of `notion_ids`."""
+        id_map = {}
+        if notion_ids is None:
+            start = 0
+            while True:
+                page = supabase.table(table_name).select('id, notion_id') \
+                    .not_.is_('notion_id', 'null') \
+                    .order('id') \
+                    .range(start, start + content_snapshot.PAGE_SIZE - 1) \
+                    .execute().data or []
+                id_map.update((row['notion_id'], row['id']) for row in page)
+                if len(page) < content_snapshot.PAGE_SIZE:
+                    return id_map
+                start += content_snapshot.PAGE_SIZE
+        
+        for start in range(0, len(notion_ids), RELATION_LOOKUP_BATCH_SIZE):
+            rows = supabase.table(table_name).select('id, notion_id') \
+                .in_('notion_id', notion_ids[start:start + RELATION_LOOKUP_BATCH_SIZE]) \
+                .execute().data or []
+            id_map.update((row['notion_id'], row['id']) for row in rows)
+        return id_map
+    
+    def apply_relations(self, table_name: str, rows: List[Dict], id_maps: Dict[str, Dict[str, str]]):
+        """Split rows into (resolved rows with foreign keys set, rows with missing targets)."""
+        resolved, unresolved = [], []
+        for row in rows:
+            refs = self.relation_refs[table_name].get(row['notion_id'], {})
+            updated = dict(row)
+            missing = False
+            for relation in RELATIONS:
+                if relation['table'] != table_name or relation['column'] not in refs:
+                    continue
+                id_map = id_maps[relation['target']]
+                page_ids = refs[relation['column']]
+                missing = missing or any(page_id not in id_map for page_id in page_ids)
+                target_ids = [id_map[page_id] for page_id in page_ids if page_id in id_map]
+                if relation['many']:
+                    updated[relation['column']] = target_ids
+                else:
+                    updated[relation['column']] = target_ids[0] if target_ids else None
+            (unresolved if missing else resolved).append(updated)
+        return resolved, unresolved
+    
+    def relation_changed(self, table_name: str, row: Dict, stored: Dict) -> bool:
+        """Whether any resolved relation column of `row` differs from the stored row."""
+        refs = self.relation_refs[table_name].get(row['notion_id'], {})
+        return any(
+            row[relation['column']] != stored.get(relation['column'])
+            for relation in RELATIONS
+            if relation['table'] == table_name and relation['column'] in refs
+        )
+    
+    def resolve_relations(self) -> Dict:
+        """Turn collected Notion relation page IDs into foreign keys on the synced rows.
+        
+        One bulk read per target table builds the notion_id -> id map and only
+        rows whose links differ from what Supabase returned for the first
+        upsert are re-upserted, in batches. References to pages that were
+        not in the map (written after the read, or by another sync) get a
+        second pass that looks up just the missing IDs; anything still
+        unresolved is reported in the sync errors and written without that link.
+        """
+        stats = {'synced': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'errors': []}
+        tables = [t for t in self.relation_refs if self.relation_refs[t] and self.relation_rows.get(t)]
+        if not tables:
+            return stats
+        
+        self.collect_relation_rows = False
         try:
-            supabase.table('content_sync_log').insert({
-                'table_name': table_name,
-                'sync_type': 'notion_to_supabase',
-                'sync_status': status,
-                'started_at': self.sync_stats['started_at'],
-                'completed_at': datetime.utcnow().isoformat(),
-                'records_synced': stats.get('synced', 0),
-                'records_created': stats.get('created', 0),
-                'records_updated': stats.get('updated', 0),
-                'records_deleted': stats.get('deleted', 0),
-                'errors': stats.get('errors', [])
-            }).execute()
+            targets = {r['target'] for r in RELATIONS if r['table'] in tables}
+            id_maps = {target: self.fetch_notion_id_map(target) for target in targets}
+            
+            deferred, stored_rows = {}, {}
+            for table_name in tables:
+                written = self.relation_rows.pop(table_name)
+                stored_rows[table_name] = {notion_id: stored for notion_id, (_, stored) in written.items()}
+                rows = [row for notion_id, (row, _) in written.items() if notion_id in self.relation_refs[table_name]]
+                resolved, deferred[table_name] = self.apply_relations(table_name, rows, id_maps)
+                changed = [row for row in resolved if self.relation_changed(table_name, row, stored_rows[table_name][row['notion_id']])]
+                self.upsert_rows(table_name, changed, 'notion_id', stats)
+            
+            # Second pass for forward references
+            for target in targets:
+                missing = {
+                    page_id
+                    for r in RELATIONS if r['target'] == target and r['table'] in tables
+                    for row in deferred[r['table']]
+                    for page_id in self.relation_refs[r['table']][row['notion_id']].get(r['column'], [])
+                    if page_id not in id_maps[target]
+                }
+                if missing:
+                    id_maps[target].update(self.fetch_notion_id_map(target, sorted(missing)))
+            
+            for table_name in tables:
+                resolved, unresolved = self.apply_relations(table_name, deferred[table_name], id_maps)
+                changed = [row for row in resolved + unresolved if self.relation_changed(table_name, row, stored_rows[table_name][row['notion_id']])]
+                self.upsert_rows(table_name, changed, 'notion_id', stats)
+                for row in unresolved:
+                    error_msg = f"Unresolved relation in {table_name} {row['notion_id']}: linked Notion page not synced"
+                    logger.warning(error_msg)
+                    stats['errors'].append(error_msg)
+            
+            logger.info(f"✅ Resolved relations, {stats['synced']} rows had changed links")
+            
         except Exception as e:
-            logger.error(f"Failed to log sync result for {table_name}: {str(e)}")
+            error_msg = f"Error resolving relations: {str(e)}"
+            logger.error(error_msg)
+            stats['errors'].append(error_msg)
+        finally:
+            self.collect_relation_rows = True
+        
+        self.sync_stats['errors'].extend(stats['errors'])
+        return stats
     
     def get_notion_property(self, properties: Dict, prop_name: str, prop_type: str) -> Any:
         """Extract property value from Notion page based on type."""
@@ -114,6 +374,161 @@ class NotionSupabaseSync:
             logger.warning(f"Error extracting property {prop_name}: {str(e)}")
             return None
     
+    def extract_blog_post(self, page: Dict) -> Dict:
+        """Map a Blog Posts page to a content_blog_posts row."""
+        props = page['properties']
+        
+        # Extract data
+        data = {
+            'notion_id': page['id'],
+            'title': self.get_notion_property(props, 'Title', 'title'),
+            'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
+            'excerpt': self.get_notion_property(props, 'Excerpt', 'rich_text'),
+            'content': self.get_notion_property(props, 'Content', 'rich_text'),
+            'category': self.get_notion_property(props, 'Category', 'select'),
+            'tags': self.get_notion_property(props, 'Tags', 'multi_select'),
+            'author': self.get_notion_property(props, 'Author', 'rich_text') or 'Kaidyn Brownlie',
+            'publish_date': self.get_notion_property(props, 'Publish Date', 'date'),
+            'read_time': self.get_notion_property(props, 'Read Time', 'number'),
+            'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
+            'image_url': self.get_notion_property(props, 'Image URL', 'url'),
+            'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        return data
+    
+    def extract_service(self, page: Dict) -> Dict:
+        """Map a Services page to a content_services row."""
+        props = page['properties']
+        
+        data = {
+            'notion_id': page['id'],
+            'name': self.get_notion_property(props, 'Name', 'title'),
+            'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
+            'short_description': self.get_notion_property(props, 'Short Description', 'rich_text'),
+            'full_description': self.get_notion_property(props, 'Full Description', 'rich_text'),
+            'service_category': self.get_notion_property(props, 'Service Category', 'select'),
+            'features': self.get_notion_property(props, 'Features', 'multi_select'),
+            'process_steps': self.get_notion_property(props, 'Process Steps', 'rich_text'),
+            'pricing_info': self.get_notion_property(props, 'Pricing Info', 'rich_text'),
+            'icon': self.get_notion_property(props, 'Icon', 'rich_text'),
+            'image_url': self.get_notion_property(props, 'Image URL', 'url'),
+            'meta_title': self.get_notion_property(props, 'Meta Title', 'rich_text'),
+            'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
+            'display_order': self.get_notion_property(props, 'Display Order', 'number') or 0,
+            'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
+            'service_tags': self.get_notion_property(props, 'Service Tags', 'multi_select'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        return data
+    
+    def extract_suburb(self, page: Dict) -> Dict:
+        """Map a Suburbs page to a content_suburbs row."""
+        props = page['properties']
+        
+        data = {
+            'notion_id': page['id'],
+            'name': self.get_notion_property(props, 'Name', 'title'),
+            'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
+            'postcode': self.get_notion_property(props, 'Postcode', 'rich_text'),
+            'region': self.get_notion_property(props, 'Region', 'select'),
+            'description': self.get_notion_property(props, 'Description', 'rich_text'),
+            'local_seo_content': self.get_notion_property(props, 'Local SEO Content', 'rich_text'),
+            'services_available': self.get_notion_property(props, 'Services Available', 'multi_select'),
+            'distance_from_base': self.get_notion_property(props, 'Distance from Base', 'number'),
+            'projects_completed': self.get_notion_property(props, 'Projects Completed', 'number') or 0,
+            'meta_title': self.get_notion_property(props, 'Meta Title', 'rich_text'),
+            'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        return data
+    
+    def extract_case_study(self, page: Dict) -> Dict:
+        """Map a Case Studies page to a content_case_studies row."""
+        props = page['properties']
+        
+        data = {
+            'notion_id': page['id'],
+            'study_id': self.get_notion_property(props, 'Study ID', 'title'),
+            'suburb': self.get_notion_property(props, 'Suburb', 'select'),
+            'job_type': self.get_notion_property(props, 'Job Type', 'select'),
+            'client_problem': self.get_notion_property(props, 'Client Problem', 'rich_text'),
+            'solution_provided': self.get_notion_property(props, 'Solution Provided', 'rich_text'),
+            'key_outcome': self.get_notion_property(props, 'Key Outcome', 'rich_text'),
+            'before_image': self.get_notion_property(props, 'Before Image', 'url'),
+            'after_image': self.get_notion_property(props, 'After Image', 'url'),
+            'testimonial': self.get_notion_property(props, 'Testimonial', 'rich_text'),
+            'project_date': self.get_notion_property(props, 'Project Date', 'date'),
+            'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
+            'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
+            'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        self.collect_relations('content_case_studies', props, data)
+        
+        return data
+    
+    def extract_testimonial(self, page: Dict) -> Dict:
+        """Map a Testimonials page to a content_testimonials row."""
+        props = page['properties']
+        
+        data = {
+            'notion_id': page['id'],
+            'client_name': self.get_notion_property(props, 'Client Name', 'title'),
+            'testimonial_text': self.get_notion_property(props, 'Testimonial Text', 'rich_text'),
+            'rating': self.get_notion_property(props, 'Rating', 'number'),
+            'service_type': self.get_notion_property(props, 'Service Type', 'select'),
+            'suburb': self.get_notion_property(props, 'Suburb', 'select'),
+            'job_date': self.get_notion_property(props, 'Job Date', 'date'),
+            'verified': self.get_notion_property(props, 'Verified', 'checkbox'),
+            'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        self.collect_relations('content_testimonials', props, data)
+        
+        return data
+    
+    def extract_faq(self, page: Dict) -> Dict:
+        """Map a Knowledge Base (FAQ) page to a content_knowledge_base row."""
+        props = page['properties']
+        
+        data = {
+            'notion_id': page['id'],
+            'question': self.get_notion_property(props, 'Question', 'title'),
+            'answer': self.get_notion_property(props, 'Answer', 'rich_text'),
+            'category': self.get_notion_property(props, 'Category', 'select'),
+            'related_services': self.get_notion_property(props, 'Related Services', 'multi_select'),
+            'display_order': self.get_notion_property(props, 'Display Order', 'number') or 0,
+            'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        self.collect_relations('content_knowledge_base', props, data)
+        
+        return data
+    
+    def extract_knowledge_file(self, page: Dict) -> Dict:
+        """Map a Knowledge Files page to a knowledge_files row."""
+        props = page['properties']
+        
+        data = {
+            'file_key': self.get_notion_property(props, 'File Key', 'title'),
+            'title': self.get_notion_property(props, 'Title', 'rich_text'),
+            'category': self.get_notion_property(props, 'Category', 'select'),
+            'content': self.get_notion_property(props, 'Content', 'rich_text'),
+            'version': self.get_notion_property(props, 'Version', 'number') or 1,
+            'active': self.get_notion_property(props, 'Active', 'checkbox'),
+            'metadata': self.get_notion_property(props, 'Metadata', 'rich_text'),
+            'last_synced_at': datetime.utcnow().isoformat()
+        }
+        
+        return data
+    
     def sync_blog_posts(self) -> Dict:
         """Sync Blog Posts database."""
         table_name = 'content_blog_posts'
@@ -127,46 +542,7 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            # Query Notion database
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    # Extract data
-                    data = {
-                        'notion_id': page['id'],
-                        'title': self.get_notion_property(props, 'Title', 'title'),
-                        'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
-                        'excerpt': self.get_notion_property(props, 'Excerpt', 'rich_text'),
-                        'content': self.get_notion_property(props, 'Content', 'rich_text'),
-                        'category': self.get_notion_property(props, 'Category', 'select'),
-                        'tags': self.get_notion_property(props, 'Tags', 'multi_select'),
-                        'author': self.get_notion_property(props, 'Author', 'rich_text') or 'Kaidyn Brownlie',
-                        'publish_date': self.get_notion_property(props, 'Publish Date', 'date'),
-                        'read_time': self.get_notion_property(props, 'Read Time', 'number'),
-                        'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
-                        'image_url': self.get_notion_property(props, 'Image URL', 'url'),
-                        'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    # Upsert to Supabase
-                    result = supabase.table(table_name).upsert(
-                        data,
-                        on_conflict='notion_id'
-                    ).execute()
-                    
-                    stats['synced'] += 1
-                    if result.data:
-                        stats['updated'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing blog post {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.run_pipeline(table_name, db_id, 'blog post', self.extract_blog_post, 'notion_id', stats)
             logger.info(f"✅ Synced {stats['synced']} blog posts")
             self.log_sync_result(table_name, 'success', stats)
             
@@ -191,40 +567,7 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    data = {
-                        'notion_id': page['id'],
-                        'name': self.get_notion_property(props, 'Name', 'title'),
-                        'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
-                        'short_description': self.get_notion_property(props, 'Short Description', 'rich_text'),
-                        'full_description': self.get_notion_property(props, 'Full Description', 'rich_text'),
-                        'service_category': self.get_notion_property(props, 'Service Category', 'select'),
-                        'features': self.get_notion_property(props, 'Features', 'multi_select'),
-                        'process_steps': self.get_notion_property(props, 'Process Steps', 'rich_text'),
-                        'pricing_info': self.get_notion_property(props, 'Pricing Info', 'rich_text'),
-                        'icon': self.get_notion_property(props, 'Icon', 'rich_text'),
-                        'image_url': self.get_notion_property(props, 'Image URL', 'url'),
-                        'meta_title': self.get_notion_property(props, 'Meta Title', 'rich_text'),
-                        'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
-                        'display_order': self.get_notion_property(props, 'Display Order', 'number') or 0,
-                        'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
-                        'service_tags': self.get_notion_property(props, 'Service Tags', 'multi_select'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    supabase.table(table_name).upsert(data, on_conflict='notion_id').execute()
-                    stats['synced'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing service {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.run_pipeline(table_name, db_id, 'service', self.extract_service, 'notion_id', stats)
             logger.info(f"✅ Synced {stats['synced']} services")
             self.log_sync_result(table_name, 'success', stats)
             
@@ -249,36 +592,7 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    data = {
-                        'notion_id': page['id'],
-                        'name': self.get_notion_property(props, 'Name', 'title'),
-                        'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
-                        'postcode': self.get_notion_property(props, 'Postcode', 'rich_text'),
-                        'region': self.get_notion_property(props, 'Region', 'select'),
-                        'description': self.get_notion_property(props, 'Description', 'rich_text'),
-                        'local_seo_content': self.get_notion_property(props, 'Local SEO Content', 'rich_text'),
-                        'services_available': self.get_notion_property(props, 'Services Available', 'multi_select'),
-                        'distance_from_base': self.get_notion_property(props, 'Distance from Base', 'number'),
-                        'projects_completed': self.get_notion_property(props, 'Projects Completed', 'number') or 0,
-                        'meta_title': self.get_notion_property(props, 'Meta Title', 'rich_text'),
-                        'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    supabase.table(table_name).upsert(data, on_conflict='notion_id').execute()
-                    stats['synced'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing suburb {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.run_pipeline(table_name, db_id, 'suburb', self.extract_suburb, 'notion_id', stats)
             logger.info(f"✅ Synced {stats['synced']} suburbs")
             self.log_sync_result(table_name, 'success', stats)
             
@@ -303,38 +617,7 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    data = {
-                        'notion_id': page['id'],
-                        'study_id': self.get_notion_property(props, 'Study ID', 'title'),
-                        'suburb': self.get_notion_property(props, 'Suburb', 'select'),
-                        'job_type': self.get_notion_property(props, 'Job Type', 'select'),
-                        'client_problem': self.get_notion_property(props, 'Client Problem', 'rich_text'),
-                        'solution_provided': self.get_notion_property(props, 'Solution Provided', 'rich_text'),
-                        'key_outcome': self.get_notion_property(props, 'Key Outcome', 'rich_text'),
-                        'before_image': self.get_notion_property(props, 'Before Image', 'url'),
-                        'after_image': self.get_notion_property(props, 'After Image', 'url'),
-                        'testimonial': self.get_notion_property(props, 'Testimonial', 'rich_text'),
-                        'project_date': self.get_notion_property(props, 'Project Date', 'date'),
-                        'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
-                        'slug': self.get_notion_property(props, 'Slug', 'rich_text'),
-                        'meta_description': self.get_notion_property(props, 'Meta Description', 'rich_text'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    supabase.table(table_name).upsert(data, on_conflict='notion_id').execute()
-                    stats['synced'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing case study {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.run_pipeline(table_name, db_id, 'case study', self.extract_case_study, 'notion_id', stats)
             logger.info(f"✅ Synced {stats['synced']} case studies")
             self.log_sync_result(table_name, 'success', stats)
             
@@ -359,33 +642,7 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    data = {
-                        'notion_id': page['id'],
-                        'client_name': self.get_notion_property(props, 'Client Name', 'title'),
-                        'testimonial_text': self.get_notion_property(props, 'Testimonial Text', 'rich_text'),
-                        'rating': self.get_notion_property(props, 'Rating', 'number'),
-                        'service_type': self.get_notion_property(props, 'Service Type', 'select'),
-                        'suburb': self.get_notion_property(props, 'Suburb', 'select'),
-                        'job_date': self.get_notion_property(props, 'Job Date', 'date'),
-                        'verified': self.get_notion_property(props, 'Verified', 'checkbox'),
-                        'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    supabase.table(table_name).upsert(data, on_conflict='notion_id').execute()
-                    stats['synced'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing testimonial {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.run_pipeline(table_name, db_id, 'testimonial', self.extract_testimonial, 'notion_id', stats)
             logger.info(f"✅ Synced {stats['synced']} testimonials")
             self.log_sync_result(table_name, 'success', stats)
             
@@ -410,31 +667,7 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    data = {
-                        'notion_id': page['id'],
-                        'question': self.get_notion_property(props, 'Question', 'title'),
-                        'answer': self.get_notion_property(props, 'Answer', 'rich_text'),
-                        'category': self.get_notion_property(props, 'Category', 'select'),
-                        'related_services': self.get_notion_property(props, 'Related Services', 'multi_select'),
-                        'display_order': self.get_notion_property(props, 'Display Order', 'number') or 0,
-                        'featured': self.get_notion_property(props, 'Featured', 'checkbox'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    supabase.table(table_name).upsert(data, on_conflict='notion_id').execute()
-                    stats['synced'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing FAQ {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.run_pipeline(table_name, db_id, 'FAQ', self.extract_faq, 'notion_id', stats)
             logger.info(f"✅ Synced {stats['synced']} FAQs")
             self.log_sync_result(table_name, 'success', stats)
             
@@ -459,32 +692,14 @@ class NotionSupabaseSync:
             
             logger.info(f"Syncing {table_name}...")
             
-            results = notion.databases.query(database_id=db_id).get('results', [])
-            
-            for page in results:
-                try:
-                    props = page['properties']
-                    
-                    data = {
-                        'file_key': self.get_notion_property(props, 'File Key', 'title'),
-                        'title': self.get_notion_property(props, 'Title', 'rich_text'),
-                        'category': self.get_notion_property(props, 'Category', 'select'),
-                        'content': self.get_notion_property(props, 'Content', 'rich_text'),
-                        'version': self.get_notion_property(props, 'Version', 'number') or 1,
-                        'active': self.get_notion_property(props, 'Active', 'checkbox'),
-                        'metadata': self.get_notion_property(props, 'Metadata', 'rich_text'),
-                        'last_synced_at': datetime.utcnow().isoformat()
-                    }
-                    
-                    supabase.table(table_name).upsert(data, on_conflict='file_key').execute()
-                    stats['synced'] += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error syncing knowledge file {page['id']}: {str(e)}"
-                    logger.error(error_msg)
-                    stats['errors'].append(error_msg)
-            
+            self.knowledge_documents.extend(
+                self.run_pipeline(table_name, db_id, 'knowledge file', self.extract_knowledge_file, 'file_key', stats)
+            )
             logger.info(f"✅ Synced {stats['synced']} knowledge files")
+            
+            if self.embedder and self.knowledge_documents:
+                self.embed_knowledge_files(stats)
+            
             self.log_sync_result(table_name, 'success', stats)
             
         except Exception as e:
@@ -492,9 +707,112 @@ class NotionSupabaseSync:
             logger.error(error_msg)
             stats['errors'].append(error_msg)
             self.log_sync_result(table_name, 'failed', stats)
+            self.knowledge_files_failed = True
         
         return stats
     
+    def embed_knowledge_files(self, stats: Dict):
+        """Embed only the knowledge file chunks whose content hash is not stored yet."""
+        try:
+            embed_stats = KnowledgeEmbeddingStage(supabase, self.embedder).run(self.knowledge_documents)
+            stats['embedded'] = embed_stats['embedded']
+            logger.info(
+                f"✅ Embedded {embed_stats['embedded']} new chunks with {self.embedder.model} "
+                f"({embed_stats['skipped']} unchanged chunks skipped, "
+                f"{embed_stats['removed_files']} inactive files removed)"
+            )
+        except Exception as e:
+            error_msg = f"Error embedding knowledge files: {str(e)}"
+            logger.error(error_msg)
+            stats['errors'].append(error_msg)
+    
+    def build_knowledge_index(self) -> Optional[Dict]:
+        """Rebuild the BM25 search index over synced knowledge files and knowledge/index.json."""
+        if self.knowledge_files_failed:
+            logger.warning("Knowledge files sync failed, keeping the previous search index")
+            return None
+        
+        try:
+            documents = [
+                {
+                    'key': f"knowledge_files:{data['file_key']}",
+                    'title': data.get('title') or data['file_key'],
+                    'category': data.get('category'),
+                    'content': data.get('content') or '',
+                }
+                for data in self.knowledge_documents
+                if data.get('file_key') and data.get('active')
+            ]
+            documents += load_local_documents()
+            
+            index_dir = os.getenv('KNOWLEDGE_INDEX_DIR', DEFAULT_INDEX_DIR)
+            manifest = KnowledgeIndexBuilder(index_dir).build(documents)
+            logger.info(
+                f"✅ Knowledge index {manifest['version']}: {manifest['chunks']} chunks, "
+                f"{manifest['reanalyzed']} documents re-indexed"
+            )
+            
+            # Compared with the bucket rather than `reanalyzed`, so removals
+            # and uploads that failed last time are published too
+            bucket = os.getenv('KNOWLEDGE_INDEX_BUCKET')
+            if bucket and self.published_knowledge_index(bucket) != manifest['current']:
+                self.publish_knowledge_index(bucket, index_dir, manifest)
+            
+            return manifest
+            
+        except Exception as e:
+            error_msg = f"Error building knowledge index: {str(e)}"
+            logger.error(error_msg)
+            self.sync_stats['errors'].append(error_msg)
+            return None
+    
+    def published_knowledge_index(self, bucket: str) -> Optional[str]:
+        """Index file the bucket's manifest points at, or None if nothing was published yet."""
+        try:
+            data = supabase.storage.from_(bucket).download('bm25/manifest.json')
+            return json.loads(data).get('current')
+        except Exception as e:
+            logger.info(f"No published knowledge index manifest in {bucket}: {str(e)}")
+            return None
+    
+    def publish_knowledge_index(self, bucket: str, index_dir: str, manifest: Dict):
+        """Upload the versioned index file, then point the bucket's manifest at it."""
+        storage = supabase.storage.from_(bucket)
+        with open(os.path.join(index_dir, manifest['current']), 'rb') as f:
+            storage.upload(
+                f"bm25/{manifest['current']}",
+                f.read(),
+                {'content-type': 'application/octet-stream', 'upsert': 'true'}
+            )
+        storage.upload(
+            'bm25/manifest.json',
+            json.dumps(manifest).encode('utf-8'),
+            {'content-type': 'application/json', 'cache-control': 'no-cache', 'upsert': 'true'}
+        )
+        logger.info(f"📤 Published knowledge index {manifest['version']} to {bucket}")
+    
+    def export_content_snapshots(self) -> Optional[Dict]:
+        """Write the content tables to precompressed static JSON bundles for the site build/CDN."""
+        out_dir = os.getenv('CONTENT_SNAPSHOT_DIR')
+        if not out_dir:
+            logger.warning("CONTENT_SNAPSHOT_DIR not set, skipping content snapshot export")
+            return None
+        
+        try:
+            result = content_snapshot.export_content_snapshots(supabase, out_dir)
+            logger.info(
+                f"✅ Content snapshots: {len(result['written'])} bundles rewritten, "
+                f"{len(result['unchanged'])} unchanged"
+            )
+            for table_name, scheduled in result['next_publish_at'].items():
+                logger.info(f"🕒 Next scheduled {table_name} row goes live at {scheduled}; export again after that")
+            return result
+        except Exception as e:
+            error_msg = f"Error exporting content snapshots: {str(e)}"
+            logger.error(error_msg)
+            self.sync_stats['errors'].append(error_msg)
+            return None
+    
     def run_full_sync(self):
         """Execute full sync of all databases."""
         logger.info("=" * 60)
@@ -510,6 +828,15 @@ class NotionSupabaseSync:
         self.sync_knowledge_base()
         self.sync_knowledge_files()
         
+        # Link rows across tables now that every relation target exists
+        self.resolve_relations()
+        
+        # Rebuild the prebuilt search index from what was just synced
+        self.build_knowledge_index()
+        
+        # Publish static bundles so pages can skip the database entirely
+        self.export_content_snapshots()
+        
         # Final summary
         logger.info("=" * 60)
         logger.info("✅ Sync Complete")
@@ -520,9 +847,14 @@ class NotionSupabaseSync:
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Sync Notion databases to Supabase content tables.")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+    
     try:
-        syncer = NotionSupabaseSync()
-        syncer.run_full_sync()
+        with profiling.profiled('notion_supabase_sync', args.profile):
+            syncer = NotionSupabaseSync()
+            syncer.run_full_sync()
         sys.exit(0)
     except Exception as e:
         logger.error(f"Fatal error during sync: {str(e)}")
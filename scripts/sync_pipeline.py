@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Table Sync Pipeline
+===================
+Runs one table sync as three concurrent stages joined by bounded queues:
+
+    fetch    pages through the Notion database query (start_cursor)
+    extract  turns each Notion page into a table row
+    write    groups rows into batches and hands each one to the writer
+             (Supabase upsert + local mirror) on the calling thread
+
+Notion requests and Supabase upserts overlap instead of running in turn.
+Because the queues are bounded, a slow writer stalls the fetcher instead
+of buffering the whole database in memory. Every error is tagged with the
+position of the page that caused it, so they are reported in page order
+whichever stage raised them.
+
+Author: Call Kaids Roofing System
+Version: 1.0.0
+"""
+
+import logging
+import os
+import queue
+import sys
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# profiling.py lives in the repository root, one level above scripts/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import profiling
+
+# Largest page size the Notion API accepts
+NOTION_PAGE_SIZE = 100
+# Items buffered between two stages before the producer blocks
+QUEUE_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def query_pages(notion, database_id: str) -> Iterator[Dict]:
+    """Every page of a Notion database, following next_cursor until has_more is false."""
+    cursor = None
+    while True:
+        params = {'database_id': database_id, 'page_size': NOTION_PAGE_SIZE}
+        if cursor:
+            params['start_cursor'] = cursor
+        with profiling.span('fetch', database_id=database_id):
+            response = notion.databases.query(**params)
+        yield from response.get('results', [])
+        cursor = response.get('next_cursor')
+        if not response.get('has_more') or not cursor:
+            return
+
+
+class TablePipeline:
+    """Fetch -> extract -> write for one table.
+
+    `extract(page) -> row` runs on the extract thread. `write(batch)` runs on
+    the caller's thread and returns (written rows, [(index in batch, error)]);
+    if it raises, the whole batch counts as failed.
+    """
+
+    def __init__(self, table_name: str, label: str, extract: Callable[[Dict], Dict],
+                 write: Callable[[List[Dict]], Tuple[List[Dict], List[Tuple[int, str]]]],
+                 batch_size: int, queue_size: int = QUEUE_SIZE):
+        self.table_name = table_name
+        self.label = label
+        self.extract = extract
+        self.write = write
+        self.batch_size = batch_size
+        self.pages: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.rows: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.errors: List[Tuple[int, str]] = []
+        self.fetch_error: Optional[BaseException] = None
+
+    def _record_error(self, seq: int, message: str):
+        logger.error(message)
+        self.errors.append((seq, message))
+
+    def _fetch(self, pages: Iterable[Dict]):
+        try:
+            for seq, page in enumerate(pages):
+                self.pages.put((seq, page))
+        except BaseException as e:
+            self.fetch_error = e
+        finally:
+            self.pages.put(_DONE)
+
+    def _extract(self):
+        while True:
+            item = self.pages.get()
+            if item is _DONE:
+                self.rows.put(_DONE)
+                return
+            seq, page = item
+            try:
+                with profiling.span('extract', table=self.table_name):
+                    row = self.extract(page)
+                self.rows.put((seq, row))
+            except Exception as e:
+                self._record_error(seq, f"Error syncing {self.label} {page.get('id')}: {str(e)}")
+
+    def _write_batch(self, batch: List[Tuple[int, Dict]], written: List[Dict]):
+        rows = [row for _, row in batch]
+        try:
+            stored, errors = self.write(rows)
+        except Exception as e:
+            self._record_error(batch[0][0], f"Error upserting {len(rows)} rows into {self.table_name}: {str(e)}")
+            return
+        written.extend(stored)
+        for index, message in errors:
+            self._record_error(batch[index][0], message)
+
+    def ordered_errors(self) -> List[str]:
+        return [message for _, message in sorted(self.errors, key=lambda error: error[0])]
+
+    def run(self, pages: Iterable[Dict]) -> List[Dict]:
+        """Drain `pages` through the stages and return the rows that were written.
+
+        An error while fetching stops the run and is re-raised once the rows
+        already fetched have been written. Row and batch errors are collected
+        for ordered_errors().
+        """
+        threads = [
+            threading.Thread(target=self._fetch, args=(pages,), name=f"{self.table_name}-fetch", daemon=True),
+            threading.Thread(target=self._extract, name=f"{self.table_name}-extract", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        written: List[Dict] = []
+        batch: List[Tuple[int, Dict]] = []
+        while True:
+            item = self.rows.get()
+            if item is _DONE:
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write_batch(batch, written)
+                batch = []
+        if batch:
+            self._write_batch(batch, written)
+
+        for thread in threads:
+            thread.join()
+        if self.fetch_error is not None:
+            raise self.fetch_error
+        return written
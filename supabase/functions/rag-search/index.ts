@@ -142,6 +142,51 @@ serve(async (req) => {
       }
     }
 
+    // Search knowledge file chunks embedded by the Notion sync (knowledge_file_embeddings)
+    if (sourceTypes.includes('all') || sourceTypes.includes('knowledge_files')) {
+      // Those are 768-dimension text-embedding-3-small vectors; shortening a
+      // text-embedding-3 vector is truncation plus re-normalisation, so the
+      // query embedding above is reused instead of requesting another one
+      const shortEmbedding = queryEmbedding.slice(0, 768);
+      const norm = Math.sqrt(shortEmbedding.reduce((sum: number, v: number) => sum + v * v, 0)) || 1;
+
+      const { data, error } = await supabase.rpc('search_knowledge_file_embeddings', {
+        query_embedding: shortEmbedding.map((v: number) => v / norm),
+        match_threshold: matchThreshold,
+        match_count: matchCount,
+        filter_category: filterCategory || null,
+      });
+
+      if (!error && data) {
+        allResults.push(...data.map((chunk: any) => {
+          let similarity = chunk.similarity;
+          if (kfFilter && chunk.file_key.startsWith(kfFilter)) {
+            similarity += 0.15;
+          } else if (priorityBoost.some(kf => chunk.file_key.startsWith(kf))) {
+            similarity += 0.05;
+          }
+
+          return {
+            id: `${chunk.file_key}_${chunk.chunk_index}`,
+            citation: `[${chunk.file_key} #${chunk.chunk_index + 1}]`,
+            doc_id: chunk.file_key,
+            title: chunk.title,
+            content: chunk.content,
+            source_table: 'knowledge_file_embeddings',
+            similarity,
+            metadata: {
+              file_key: chunk.file_key,
+              category: chunk.category,
+              chunk_index: chunk.chunk_index,
+              kf_routing_applied: kfFilter || priorityBoost.join(',') || 'none'
+            }
+          };
+        }));
+      } else if (error) {
+        console.error('Knowledge file embedding search error:', error);
+      }
+    }
+
     // Search workflows if requested
     if (sourceTypes.includes('all') || sourceTypes.includes('workflows')) {
       const { data: workflowData, error: workflowError } = await supabase
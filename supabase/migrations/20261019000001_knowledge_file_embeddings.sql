@@ -0,0 +1,33 @@
+-- Chunk embeddings for knowledge_files, written by the Notion sync's embedding stage
+-- (scripts/knowledge_embeddings.py). One row per chunk, keyed by a hash of the
+-- model + chunk text so unchanged chunks are never re-embedded.
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS public.knowledge_file_embeddings (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  file_key TEXT NOT NULL REFERENCES public.knowledge_files(file_key) ON DELETE CASCADE,
+  chunk_index INTEGER NOT NULL,
+  content_hash TEXT NOT NULL,
+  content TEXT NOT NULL,
+  embedding VECTOR(768) NOT NULL,
+  model TEXT NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  UNIQUE (file_key, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_knowledge_file_embeddings_embedding
+  ON public.knowledge_file_embeddings USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+
+ALTER TABLE public.knowledge_file_embeddings ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Authenticated users can view knowledge file embeddings" ON public.knowledge_file_embeddings
+  FOR SELECT TO authenticated USING (true);
+
+CREATE POLICY "Admins can manage knowledge file embeddings" ON public.knowledge_file_embeddings
+  FOR ALL TO authenticated
+  USING (public.is_admin_user(auth.uid()))
+  WITH CHECK (public.is_admin_user(auth.uid()));
+
+COMMENT ON TABLE public.knowledge_file_embeddings IS 'Chunk-level embeddings of knowledge_files, skipped when the chunk content hash is unchanged';
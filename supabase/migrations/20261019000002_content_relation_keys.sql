@@ -0,0 +1,16 @@
+-- Foreign keys filled in from Notion relation properties by the Notion sync's
+-- relation-resolution stage (scripts/notion_supabase_sync.py, RELATIONS).
+-- content_testimonials.case_study_id already exists and is resolved the same way.
+
+ALTER TABLE public.content_case_studies
+  ADD COLUMN IF NOT EXISTS suburb_id UUID REFERENCES public.content_suburbs(id) ON DELETE SET NULL;
+
+ALTER TABLE public.content_knowledge_base
+  ADD COLUMN IF NOT EXISTS related_service_ids UUID[] DEFAULT '{}';
+
+CREATE INDEX IF NOT EXISTS idx_case_studies_suburb_id ON public.content_case_studies(suburb_id);
+CREATE INDEX IF NOT EXISTS idx_knowledge_base_related_service_ids
+  ON public.content_knowledge_base USING gin (related_service_ids);
+
+COMMENT ON COLUMN public.content_case_studies.suburb_id IS 'content_suburbs row linked through the Notion "Suburb Page" relation';
+COMMENT ON COLUMN public.content_knowledge_base.related_service_ids IS 'content_services rows linked through the Notion "Service Pages" relation';
@@ -0,0 +1,16 @@
+-- Embeddings carry the chunk text, so they must not be readable where the
+-- knowledge file itself is hidden: only chunks of active knowledge files are
+-- visible to authenticated users (matching the knowledge_files policy).
+-- The Notion sync deletes the chunks of deactivated files.
+
+DROP POLICY IF EXISTS "Authenticated users can view knowledge file embeddings" ON public.knowledge_file_embeddings;
+
+CREATE POLICY "Authenticated users can view active knowledge file embeddings" ON public.knowledge_file_embeddings
+  FOR SELECT TO authenticated
+  USING (
+    EXISTS (
+      SELECT 1 FROM public.knowledge_files kf
+      WHERE kf.file_key = knowledge_file_embeddings.file_key
+        AND kf.active = true
+    )
+  );
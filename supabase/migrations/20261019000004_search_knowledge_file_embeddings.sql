@@ -0,0 +1,46 @@
+-- Semantic search over the chunk embeddings written by the Notion sync
+-- (knowledge_file_embeddings). Used by the rag-search edge function, and
+-- through it by chat-with-rag. Only chunks of active knowledge files from the
+-- requested embedding model are returned.
+
+CREATE OR REPLACE FUNCTION public.search_knowledge_file_embeddings(
+  query_embedding vector(768),
+  match_threshold float DEFAULT 0.7,
+  match_count int DEFAULT 5,
+  filter_category text DEFAULT NULL,
+  filter_model text DEFAULT 'text-embedding-3-small'
+)
+RETURNS TABLE (
+  id uuid,
+  file_key text,
+  title text,
+  category text,
+  chunk_index integer,
+  content text,
+  similarity float
+)
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    kfe.id,
+    kfe.file_key,
+    kf.title,
+    kf.category,
+    kfe.chunk_index,
+    kfe.content,
+    1 - (kfe.embedding <=> query_embedding) AS similarity
+  FROM public.knowledge_file_embeddings kfe
+  JOIN public.knowledge_files kf ON kf.file_key = kfe.file_key
+  WHERE kf.active = true
+    AND kfe.model = filter_model
+    AND (filter_category IS NULL OR kf.category = filter_category)
+    AND 1 - (kfe.embedding <=> query_embedding) > match_threshold
+  ORDER BY kfe.embedding <=> query_embedding
+  LIMIT match_count;
+END;
+$$;
+
+COMMENT ON FUNCTION public.search_knowledge_file_embeddings IS 'Performs semantic similarity search on knowledge file chunk embeddings using cosine distance';
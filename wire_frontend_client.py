@@ -1,6 +1,10 @@
+import argparse
 import os
 import re
 
+import profiling
+import rewrite_engine
+
 # ONLY scan the Frontend source code
 ROOT_DIR = "./src"
 EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx'}
@@ -8,21 +12,17 @@ EXTENSIONS = {'.ts', '.tsx', '.js', '.jsx'}
 # The Golden Import we want to inject
 NEW_IMPORT = 'import { supabase } from "@/lib/supabaseClient";'
 
-def process_file(file_path):
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
-
+def wire_content(content):
+    """Swap a manual createClient() setup for the golden client import."""
     # Skip files that already use the golden client
     if '@/lib/supabaseClient' in content:
-        return
+        return content
 
     # Check if this file actually creates a manual client
     # We look for: createClient(
     if 'createClient(' not in content:
-        return
+        return content
 
-    print(f"   ⚡ Wiring: {file_path}")
-    
     lines = content.split('\n')
     new_lines = []
     import_added = False
@@ -54,26 +54,48 @@ def process_file(file_path):
     if not import_added:
         new_lines.insert(0, NEW_IMPORT)
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(new_lines))
+    return '\n'.join(new_lines)
 
 def main():
+    parser = argparse.ArgumentParser(description="Point frontend files at the golden Supabase client.")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--rollback", nargs="?", const="latest", metavar="RUN_ID", help="undo the latest wiring run, or RUN_ID")
+    profiling.add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiling.profiled("wire_frontend_client", args.profile):
+        run(args)
+
+def run(args):
+    if args.rollback:
+        run_id, restored = rewrite_engine.rollback("wire_frontend_client", None if args.rollback == "latest" else args.rollback)
+        if run_id is None:
+            print("🤷 No wiring run to roll back.")
+        else:
+            print(f"⏪ Rolled back {run_id}: restored {len(restored)} files.")
+        return
+
     print(f"🚀 Starting Frontend Wiring in: {os.path.abspath(ROOT_DIR)}")
     
-    count = 0
-    for root, dirs, files in os.walk(ROOT_DIR):
-        for file in files:
-            _, ext = os.path.splitext(file)
-            if ext in EXTENSIONS:
-                process_file(os.path.join(root, file))
-                count += 1
+    paths = []
+    with profiling.span("walk"):
+        for root, dirs, files in os.walk(ROOT_DIR):
+            for file in files:
+                _, ext = os.path.splitext(file)
+                if ext in EXTENSIONS:
+                    paths.append(os.path.join(root, file))
+
+    run_id, changed = rewrite_engine.run_rewrites("wire_frontend_client", paths, wire_content, args.workers)
+    for path in changed:
+        print(f"   ⚡ Wired: {path}")
 
     print("\n" + "="*40)
     print(f"✅ WIRING COMPLETE")
-    print(f"📊 Scanned {count} frontend files.")
+    print(f"📊 Scanned {len(paths)} frontend files, modified {len(changed)}.")
     print("👉 Manual connections have been commented out.")
     print("👉 New Golden Client has been imported.")
+    if run_id:
+        print(f"👉 Undo with: python wire_frontend_client.py --rollback {run_id}")
     print("="*40)
 
 if __name__ == "__main__":